@@ -0,0 +1,523 @@
+# ================================================================================================================
+# File: mem_model.py
+# ================================================================================================================
+#
+# >>> Descrição: Modelo de Memória e MMIO compartilhado pelos testbenches do Processador RISC-V (RV32I).
+#     Centraliza o que é COMUM entre os cores (single-cycle e multi-cycle):
+#      1. Carregador de programa (.hex gerado pelo objcopy -O verilog).
+#      2. Memória Principal (RAM de Instruções e Dados unificada).
+#      3. Controlador de Periféricos (MMIO) para Console, Interrupções e Controle de Simulação.
+#
+#     Cada test_processor.py define apenas a sequência de reset específica do seu core.
+#
+# ================================================================================================================
+
+# Importações COCOTB
+import cocotb
+from cocotb.clock import Clock
+from cocotb.triggers import RisingEdge, ClockCycles, Event
+
+# Variáveis de ambiente (seleção do clock Python/HDL)
+import os
+
+# Fila de interrupções pendentes (alimentada pelo MMIO e consumida pelo driver de IRQ)
+from collections import deque
+
+# Leitura do .hex mapeada em memória (sem decodificação em modo texto)
+import mmap
+
+# RAM como array de palavras de 32 bits (e ordem de bytes do host)
+import sys
+from array import array
+
+# Reinterpretação de 32 bits como inteiro com sinal (complemento de 2)
+from ctypes import c_int32
+
+# Importa utilitários compartilhados (logs customizados, funções de delay, etc.)
+from test_utils import (
+    log_info, log_success, log_console, log_error, log_int, settle, int_reader
+)
+
+# ================================================================================================================
+# MAPA DE MEMÓRIA (Memory Map)
+# ================================================================================================================
+
+# Define os endereços reservados para interação com o ambiente de simulação.
+# O processador escreve nestes endereços usando instruções SW (Store Word).
+
+MMIO_CONSOLE_ADDR     = 0x10000000  # Escrita de char: Imprime caractere no terminal
+MMIO_INT_ADDR         = 0x10000004  # Escrita de int:  Imprime valor numérico (debug)
+MMIO_HALT_ADDR        = 0x10000008  # Escrita de flag: Encerra a simulação com sucesso (HALT)
+MMIO_IRQ_TRIGGER_ADDR = 0x20000000  # Endereço para solicitar disparo de Interrupção
+
+# Tamanho da RAM simulada (sim/sw/platform/linker/link.ld: 16KB a partir de 0x0).
+# Endereços MMIO são tratados antes de qualquer acesso à RAM.
+RAM_SIZE = 0x4000
+
+# Máscara de 32 bits correspondente a cada valor do byte enable (4 bits) de um STORE
+BE_MASK = [
+    0x00000000, 0x000000FF, 0x0000FF00, 0x0000FFFF,
+    0x00FF0000, 0x00FF00FF, 0x00FFFF00, 0x00FFFFFF,
+    0xFF000000, 0xFF0000FF, 0xFF00FF00, 0xFF00FFFF,
+    0xFFFF0000, 0xFFFF00FF, 0xFFFFFF00, 0xFFFFFFFF,
+]
+
+# Pares (keep, data_mask) por byte enable: bytes preservados da palavra atual e bytes vindos do dado
+WE_TABLE = [(~mask & 0xFFFFFFFF, mask) for mask in BE_MASK]
+
+CLK_PERIOD_NS    = 10  # Período do clock da simulação (100MHz)
+IRQ_PULSE_CYCLES = 30  # Duração padrão do pulso de interrupção, em ciclos de clock
+
+class HandshakeMode:
+    """Protocolo de barramento de memória do core sob teste"""
+    SYNC        = "sync"         # Single-cycle: memória responde no mesmo ciclo (amostra após a borda)
+    READY_VALID = "ready_valid"  # Multi-cycle: handshake Ready/Valid em IMEM e DMEM
+
+def start_clock(dut):
+    """
+    Inicia o clock do processador em Python (100MHz).
+    Com USE_PY_CLOCK=0 o clock é gerado no HDL (TOP=processor_clk_wrapper) e nada é iniciado:
+    o testbench apenas sincroniza nas bordas de dut.CLK_i.
+    """
+    if os.environ.get("USE_PY_CLOCK", "1") != "0":
+        # impl="gpi": toggle agendado no lado C do cocotb (sem corrotina Python por meio ciclo)
+        cocotb.start_soon(Clock(dut.CLK_i, CLK_PERIOD_NS, unit="ns", impl="gpi").start())
+
+# ================================================================================================================
+# 1. CARREGADOR DE PROGRAMA (HEX LOADER)
+# ================================================================================================================
+
+def parse_hex_blocks(filepath):
+    """
+    Lê o arquivo .hex gerado e retorna os blocos contíguos de bytes.
+
+    O arquivo é lido via mmap e cada bloco (@ADDR) é decodificado de uma vez
+    para um bytearray (bytes.fromhex), sem laço Python por byte ou por palavra.
+
+    Args:
+        filepath (str): Caminho para o arquivo .hex
+
+    Returns:
+        dict: Mapa {endereço_base: bytearray} com os bytes de cada bloco (Little Endian).
+    """
+
+    blocks = {}
+    buf = blocks.setdefault(0, bytearray())
+
+    log_info(f"Loader: carregando software {filepath}...")
+
+    try:
+        # Arquivo mapeado em memória; as linhas são delimitadas com busca de b'\n' em C
+        with open(filepath, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            pos, end = 0, len(mm)
+            while pos < end:
+                nl = mm.find(b'\n', pos)
+                if nl < 0: nl = end
+                line = mm[pos:nl].translate(None, b' \t\r')
+                pos = nl + 1
+                if not line: continue
+
+                # O formato gerado pelo objcopy -O verilog usa @ADDR para pular endereços
+                if line[0] == 0x40:  # '@'
+                    # Novo bloco: define endereço base (remove o @ e converte de hex)
+                    buf = blocks.setdefault(int(line[1:], 16), bytearray())
+                else:
+                    # Linha de bytes de dados (ex: "13 00 00 00"), decodificada em bloco
+                    buf.extend(bytes.fromhex(line.decode('ascii')))
+
+    except Exception as e:
+        log_error(f"Falha crítica no Loader: {e}")
+        return {}
+
+    return blocks
+
+def build_ram(blocks):
+    """
+    Monta a RAM como um array('I') de palavras de 32 bits (índice = endereço >> 2).
+
+    Cada bloco é copiado para a imagem de bytes com uma única atribuição de fatia e
+    a imagem é convertida de uma vez em palavras. O tamanho cobre a RAM do linker
+    script (RAM_SIZE) ou a imagem carregada, o que for maior.
+    """
+    image_end = max((base + len(buf) for base, buf in blocks.items()), default=0)
+    size = max(RAM_SIZE, (image_end + 3) & ~3)
+    image = bytearray(size)
+    for base, buf in blocks.items():
+        image[base:base + len(buf)] = buf
+
+    ram = array('I', image)
+
+    # A imagem é Little Endian; em um host Big Endian os bytes de cada palavra são invertidos
+    if sys.byteorder != 'little':
+        ram.byteswap()
+
+    return ram
+
+def load_hex(filepath):
+    """Carrega o .hex e retorna a RAM pronta para o controlador (array de palavras)"""
+    return build_ram(parse_hex_blocks(filepath))
+
+# ================================================================================================================
+# 2. ACESSO À RAM
+# ================================================================================================================
+
+def ram_read(ram, addr):
+    """Lê a palavra alinhada; fora da RAM retorna 0"""
+    index = (addr & 0xFFFFFFFC) >> 2
+    return ram[index] if index < len(ram) else 0
+
+def ram_write(ram, addr, data, we, _we_table=WE_TABLE):
+    """Mescla na palavra apenas os byte lanes habilitados por `we` (a LSU já alinhou o dado)"""
+    index = (addr & 0xFFFFFFFC) >> 2
+    if index >= len(ram):
+        # Fora da RAM simulada: escrita descartada
+        return
+    we &= 0xF
+    if we == 0xF:
+        # SW (palavra inteira, caso mais comum): atribuição direta, sem leitura da palavra antiga
+        ram[index] = data & 0xFFFFFFFF
+        return
+    # SB/SH: merge sem desvios: máscara de 32 bits da LUT (byte enable -> bytes afetados)
+    keep, mask = _we_table[we]
+    ram[index] = (ram[index] & keep) | (data & mask)
+
+# ================================================================================================================
+# 3. GATILHO DE INTERRUPÇÕES (Simulação de Hardware Externo/CLINT/PLIC)
+# ================================================================================================================
+
+async def pulse_irq(dut, irq_type, cycles=IRQ_PULSE_CYCLES):
+    """
+    Gera um pulso na linha de interrupção baseada no tipo solicitado pelo C.
+    irq_type: 1=Timer, 2=Software, 3=External
+    """
+    signal = None
+    name = "Unknown"
+
+    # Seleciona qual pino do processador acionar
+    if irq_type == 1:
+        signal = dut.Irq_Timer_i
+        name = "TIMER (MTIP)"
+    elif irq_type == 2:
+        signal = dut.Irq_Software_i
+        name = "SOFTWARE (MSIP)"
+    elif irq_type == 3:
+        signal = dut.Irq_External_i
+        name = "EXTERNAL (MEIP)"
+
+    if signal is not None:
+        log_info(f"⚡ [SIM] Trigger recebido: Disparando IRQ {name}...")
+
+        # Levanta o sinal
+        signal.value = 1
+
+        # Mantém alto por tempo suficiente para o core detectar e entrar na trap.
+        # CUIDADO: Se for muito longo e o handler for rápido, o core re-entra na IRQ (Interrupt Storm).
+        # 30 ciclos costuma ser seguro (suficiente para fetch/decode/trap entry).
+        # Um único trigger contando bordas do clock do DUT (exato em ciclos, independente do período).
+        await ClockCycles(dut.CLK_i, cycles)
+
+        # Baixa o sinal (Simula o CLINT limpando a flag ou pulso momentâneo)
+        signal.value = 0
+        log_info(f"⚡ [SIM] IRQ {name} liberada (Low).")
+    else:
+        log_error(f"⚠️ [SIM] Tipo de IRQ inválido recebido: {irq_type}")
+
+async def _irq_driver(dut, irq_event, pending, cycles):
+    """
+    Corrotina de vida longa que gera os pulsos de IRQ solicitados via MMIO.
+    Evita criar uma Task nova a cada gatilho: o MMIO apenas enfileira o tipo e sinaliza o evento.
+    """
+    while True:
+        await irq_event.wait()
+        irq_event.clear()
+        # Pulsos solicitados durante um pulso em andamento são atendidos em sequência
+        while pending:
+            await pulse_irq(dut, pending.popleft(), cycles)
+
+# ================================================================================================================
+# 4. PERIFÉRICOS MMIO
+# ================================================================================================================
+
+def make_mmio_handlers(dut, halt_event, pulse_irq_cycles=0):
+    """
+    Monta a tabela {endereço: handler(dado)} dos periféricos MMIO.
+    O gatilho de interrupção só é registrado se pulse_irq_cycles > 0 (cores com linhas de IRQ).
+    """
+    console_buffer = bytearray()
+
+    # Periférico: CONSOLE (Simula UART)
+    def _do_console(data):
+        # Assume que a escrita no console usa o byte menos significativo (we=1 ou we=15).
+        # Acumula bytes crus; a linha inteira é decodificada (UTF-8) só ao receber '\n'
+        byte = data & 0xFF
+        if byte == 0x0A:  # '\n'
+            log_console(console_buffer.decode('utf-8', 'replace'))
+            console_buffer.clear()
+        else:
+            console_buffer.append(byte)
+
+    # Periférico: DEBUG INT (Imprime Inteiros)
+    def _do_int(data):
+        log_int(f"{c_int32(data).value}")
+
+    # Controle: HALT (Fim de Simulação)
+    def _do_halt(data):
+        log_success("Sinal de HALT recebido via MMIO! Encerrando simulação.")
+        halt_event.set()
+
+    handlers = {
+        MMIO_CONSOLE_ADDR: _do_console,
+        MMIO_INT_ADDR:     _do_int,
+        MMIO_HALT_ADDR:    _do_halt,
+    }
+
+    if pulse_irq_cycles > 0:
+        # Gatilho de Interrupção: o pulso é gerado em background por um único driver,
+        # para não travar o handshake da memória
+        irq_event = Event()
+        pending   = deque()
+        cocotb.start_soon(_irq_driver(dut, irq_event, pending, pulse_irq_cycles))
+
+        def _do_irq_trigger(data):
+            pending.append(data)
+            irq_event.set()
+
+        handlers[MMIO_IRQ_TRIGGER_ADDR] = _do_irq_trigger
+
+    return handlers
+
+# ================================================================================================================
+# 5. CONTROLADOR DE MEMÓRIA E PERIFÉRICOS
+# ================================================================================================================
+
+def make_controller(dut, ram, halt_event, *, mode, we_signal="DMem_we_o", pulse_irq_cycles=0):
+    """
+    Cria a corrotina do controlador de memória/MMIO para o protocolo do core.
+
+    Args:
+        dut: Handle do processador sob teste.
+        ram (array): RAM retornada por load_hex().
+        halt_event (Event): Sinalizado quando o software escreve em MMIO_HALT_ADDR.
+        mode (str): HandshakeMode.SYNC ou HandshakeMode.READY_VALID.
+        we_signal (str): Nome da porta de byte enable de escrita da DMEM.
+        pulse_irq_cycles (int): Duração do pulso de IRQ (0 = core sem linhas de interrupção).
+
+    Returns:
+        Corrotina a ser lançada com cocotb.start_soon().
+    """
+    mmio_handlers = make_mmio_handlers(dut, halt_event, pulse_irq_cycles)
+    we_o = getattr(dut, we_signal)
+
+    if mode == HandshakeMode.READY_VALID:
+        return _ready_valid_controller(dut, ram, halt_event, mmio_handlers, we_o)
+    if mode == HandshakeMode.SYNC:
+        return _sync_controller(dut, ram, halt_event, mmio_handlers, we_o)
+    raise ValueError(f"Modo de handshake desconhecido: {mode}")
+
+async def _sync_controller(dut, ram, halt_event, mmio_handlers, we_o):
+    """
+    Simula o comportamento da memória RAM e dos dispositivos de I/O (Modelo Síncrono).
+    """
+    log_info("Controlador de Memória Ativo e Monitorando Barramentos.")
+
+    # Handles do DUT resolvidos uma única vez (fora do loop)
+    imem_addr   = dut.IMem_addr_o
+    imem_data_i = dut.IMem_data_i
+    dmem_addr   = dut.DMem_addr_o
+    dmem_data_i = dut.DMem_data_i
+    dmem_data_o = dut.DMem_data_o
+
+    # Funções e tabela MMIO ligadas a variáveis locais (LOAD_FAST no loop, sem busca global)
+    read_word  = ram_read
+    write_word = ram_write
+    mmio_get   = mmio_handlers.get
+
+    # Trigger de borda criado uma única vez e reutilizado a cada ciclo
+    clk_edge = RisingEdge(dut.CLK_i)
+
+    # Última instrução entregue em IMem_data_i: a escrita GPI só acontece quando a
+    # palavra muda. A comparação é pelo conteúdo (não pelo endereço), então um store
+    # sobre o próprio código continua sendo visto na busca seguinte.
+    last_instr = None
+
+    while True:
+
+        # ----------------------------------------------------------------------
+        # [FASE 0] INÍCIO DO CICLO (Sincronização)
+        # ----------------------------------------------------------------------
+        await clk_edge
+        await settle()
+
+        # ----------------------------------------------------------------------
+        # [FASE 1] INSTRUCTION FETCH (Busca de Instrução)
+        # ----------------------------------------------------------------------
+        try:
+            i_addr = int(imem_addr.value)
+        except ValueError:
+            i_addr = 0
+
+        instruction_val = read_word(ram, i_addr)
+        if instruction_val != last_instr:
+            imem_data_i.value = instruction_val
+            last_instr = instruction_val
+
+        # ----------------------------------------------------------------------
+        # [FASE 2] DECODE & EXECUTE DELAY (Propagação Interna)
+        # ----------------------------------------------------------------------
+        await settle()
+
+        # ----------------------------------------------------------------------
+        # [FASE 3] MEMORY READ (Leitura de Dados - Loads)
+        # ----------------------------------------------------------------------
+        try:
+            d_addr = int(dmem_addr.value)
+        except ValueError:
+            d_addr = 0
+
+        # Entrega o dado da memória (Loads leem a palavra inteira, a LSU formata)
+        dmem_data_i.value = read_word(ram, d_addr)
+
+        # ----------------------------------------------------------------------
+        # [FASE 4] WRITE SETUP DELAY (Preparação para Escrita)
+        # ----------------------------------------------------------------------
+        await settle()
+
+        # ----------------------------------------------------------------------
+        # [FASE 5] MEMORY WRITE (Efetivação da Escrita - Stores)
+        # ----------------------------------------------------------------------
+
+        # Verifica sinais de escrita: a máscara é lida primeiro e, na maioria dos
+        # ciclos (d_we == 0), dado e endereço de escrita nem chegam a ser lidos
+        try:
+            d_we = int(we_o.value)
+            if d_we:
+                d_data = int(dmem_data_o.value)
+                d_addr_write = int(dmem_addr.value)
+        except ValueError:
+            d_we = 0
+
+        # Verifica se ALGUM bit da máscara de escrita está ativo
+        if d_we:
+
+            # --- Periféricos MMIO (Console, Debug Int, HALT) ---
+            handler = mmio_get(d_addr_write)
+            if handler is not None:
+                handler(d_data)
+                if halt_event.is_set():
+                    break
+
+            # --- Memória: RAM NORMAL (Store com Byte Enable) ---
+            else:
+                # A LSU já deslocou o d_data para a posição correta (byte lane alignment).
+                # Só os bytes habilitados por d_we são escritos na RAM.
+                write_word(ram, d_addr_write, d_data, d_we)
+
+async def _ready_valid_controller(dut, ram, halt_event, mmio_handlers, we_o):
+    """
+    Simula Memória com Latência e Handshake (Ready/Valid) para Instruções e Dados.
+    """
+    log_info("Controlador de Memória (Ready/Valid IMEM+DMEM) Ativo.")
+
+    # Estados internos para evitar processamento duplo.
+    # Também espelham o último valor escrito em IMem_rdy_i/DMem_rdy_i: o Ready
+    # só é escrito nas transições, sem escritas GPI redundantes a cada ciclo.
+    d_transaction_in_progress = False
+    i_transaction_in_progress = False
+
+    # Handles do DUT resolvidos uma única vez (fora do loop)
+    imem_vld    = dut.IMem_vld_o
+    imem_rdy    = dut.IMem_rdy_i
+    imem_addr   = dut.IMem_addr_o
+    imem_data_i = dut.IMem_data_i
+    dmem_vld    = dut.DMem_vld_o
+    dmem_rdy    = dut.DMem_rdy_i
+    dmem_addr   = dut.DMem_addr_o
+    dmem_data_i = dut.DMem_data_i
+    dmem_data_o = dut.DMem_data_o
+
+    # Inicializa os Ready em 0
+    imem_rdy.value = 0
+    dmem_rdy.value = 0
+
+    # Funções e tabela MMIO ligadas a variáveis locais (LOAD_FAST no loop, sem busca global)
+    read_word  = ram_read
+    write_word = ram_write
+    mmio_get   = mmio_handlers.get
+
+    # Trigger de borda criado uma única vez e reutilizado a cada ciclo
+    clk_edge = RisingEdge(dut.CLK_i)
+
+    # Aquecimento: nos primeiros ciclos o VHDL ainda pode estar com valores indeterminados.
+    # Espera as linhas de valid saírem de X/U/Z (após o reset nunca voltam) antes do loop principal,
+    # que então lê os valid sem nenhuma checagem extra. Como o core mantém valid até receber
+    # ready, nenhuma transação é perdida.
+    await clk_edge
+    while not (imem_vld.value.is_resolvable and dmem_vld.value.is_resolvable):
+        await clk_edge
+
+    # Leitores inteiros diretos do GPI: após o aquecimento, valid (e, com valid alto,
+    # endereço/máscara/dado) estão resolvidos, então o LogicArray de .value é dispensável
+    get_i_vld  = int_reader(imem_vld)
+    get_d_vld  = int_reader(dmem_vld)
+    get_i_addr = int_reader(imem_addr)
+    get_d_addr = int_reader(dmem_addr)
+    get_we     = int_reader(we_o)
+    get_data_w = int_reader(dmem_data_o)
+
+    while True:
+        await clk_edge
+
+        # HALT recebido no ciclo anterior: libera o barramento e encerra o controlador
+        if halt_event.is_set():
+            imem_rdy.value = 0
+            dmem_rdy.value = 0
+            return
+
+        # --- 1. CAPTURA SINAIS DE CONTROLE ---
+        i_vld = get_i_vld()
+        d_vld = get_d_vld()
+
+        # Ciclo ocioso (nenhum valid e nenhuma transação aberta): nada a ler nem a escrever
+        if not (i_vld or d_vld or i_transaction_in_progress or d_transaction_in_progress):
+            continue
+
+        # --- 2. HANDSHAKE DE INSTRUÇÕES (IMem) ---
+        if i_vld == 1:
+            if not i_transaction_in_progress:
+                i_transaction_in_progress = True
+                imem_rdy.value = 1
+
+                # Busca endereço e entrega dado (Instrução)
+                addr_i = get_i_addr()
+                imem_data_i.value = read_word(ram, addr_i)
+            # Senão: Ready já está em 1 e é mantido até o Core processar
+        elif i_transaction_in_progress:
+            i_transaction_in_progress = False
+            imem_rdy.value = 0
+
+        # --- 3. HANDSHAKE DE DADOS (DMem) ---
+        if d_vld == 1:
+            if not d_transaction_in_progress:
+                d_transaction_in_progress = True
+                dmem_rdy.value = 1
+
+                addr_d = get_d_addr()
+                we     = get_we()
+
+                # Processa Leitura
+                dmem_data_i.value = read_word(ram, addr_d)
+
+                # Processa Escrita (MMIO via tabela de handlers; senão, RAM).
+                # O dado de escrita só é lido quando há escrita (loads saem aqui)
+                if we:
+                    data_w = get_data_w() & 0xFFFFFFFF
+                    handler = mmio_get(addr_d)
+                    if handler is not None:
+                        handler(data_w)
+                    else:
+                        # Escrita normal na RAM (apenas os bytes habilitados)
+                        write_word(ram, addr_d, data_w, we)
+            # Senão: Ready já está em 1 e é mantido até o Core processar
+        elif d_transaction_in_progress:
+            d_transaction_in_progress = False
+            dmem_rdy.value = 0
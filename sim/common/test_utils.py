@@ -13,6 +13,9 @@
 import cocotb
 from cocotb.triggers import Timer
 import logging
+import os
+import random
+from ctypes import c_int32
 
 # ==============================================================================
 # CONFIGURAÇÃO DE LOGGING E VISUAL
@@ -102,8 +105,14 @@ OP_AUIPC  = 0x17   # Add Upper Immediate to PC
 # CONVERSÃO E DADOS
 # ==============================================================================
 
+MASK32 = 0xFFFFFFFF   # Máscara de 32 bits
+SIGN32 = 0x80000000   # Bit de sinal de 32 bits
+
 def to_signed(val, bits=32):
     """Converte int para signed (complemento de 2)"""
+    if bits == 32:
+        # Caso comum: cast de 32 bits feito em C pelo ctypes
+        return c_int32(val).value
     val = val & ((1 << bits) - 1)
     if val & (1 << (bits - 1)):
         val -= (1 << bits)
@@ -111,8 +120,32 @@ def to_signed(val, bits=32):
 
 def to_unsigned(val, bits=32):
     """Garante que o valor seja tratado como unsigned"""
+    if bits == 32:
+        return val & MASK32
     return val & ((1 << bits) - 1)
 
+def fast_int(sig):
+    """
+    Lê o valor de um sinal como inteiro (unsigned).
+    Caminho direto para sinais resolvidos; X/Z/U geram um erro legível com o nome do sinal.
+    """
+    v = sig.value
+    if v.is_resolvable:
+        return int(v)
+    raise ValueError(f"Sinal {sig._name} não resolvível: {v}")
+
+def int_reader(sig):
+    """
+    Retorna uma função sem argumentos que lê o sinal como inteiro direto do GPI,
+    sem montar um LogicArray a cada leitura (caminho de loops quentes).
+    Só use com sinais já resolvidos (sem X/Z/U): o valor não é validado.
+    Pode retornar negativo para vetores de 32 bits com o MSB em 1 (aplique & 0xFFFFFFFF).
+    """
+    raw = getattr(getattr(sig, "_handle", None), "get_signal_val_long", None)
+    if raw is not None:
+        return raw
+    return lambda: int(sig.value)
+
 def int_to_char(val):
     """Tenta converter int para char seguro para print"""
     try:
@@ -126,6 +159,26 @@ def sign_extend(value, bits):
     sign_bit = 1 << (bits - 1)
     return (value & (sign_bit - 1)) - (value & sign_bit)
 
+# ==============================================================================
+# PARALELISMO (STRESS TESTS)
+# ==============================================================================
+
+def stress_iterations(total):
+    """
+    Retorna o número de iterações do stress test para esta simulação.
+    Com STRESS_SHARDS=K o total é dividido entre K simulações independentes,
+    que podem rodar em paralelo (cada uma com sua semente, COCOTB_RANDOM_SEED).
+    """
+    shards = max(1, int(os.environ.get("STRESS_SHARDS", "1")))
+    return max(1, total // shards)
+
+def stress_rng():
+    """
+    Gerador local para o estímulo dos stress tests, com a semente do cocotb.
+    Reprodutível com COCOTB_RANDOM_SEED (e distinto entre shards com sementes diferentes).
+    """
+    return random.Random(cocotb.RANDOM_SEED)
+
 # ==============================================================================
 # SINCRONIZAÇÃO DE SINAIS
 # ==============================================================================
@@ -134,4 +187,13 @@ async def settle():
     """Aguarda um passo de tempo para propagação de sinais"""
     await Timer(1, unit="ns")
 
+async def settle_comb():
+    """Aguarda um único passo de simulação (suficiente para lógica puramente combinacional)"""
+    await Timer(1, unit="step")
+
+def drive_zero(dut, names):
+    """Zera de uma vez um conjunto de entradas do DUT (ex.: barramentos e IRQs durante o reset)"""
+    for name in names:
+        getattr(dut, name).value = 0
+
 # ==============================================================================
\ No newline at end of file
@@ -9,10 +9,9 @@
 # ============================================================================================================================================================
 
 import cocotb   # Biblioteca principal do cocotb
-import random   # Para gerar valores aleatórios nos testes
 
 # Importa utilitários compartilhados entre testbenches
-from test_utils import log_header, log_info, log_success, log_error, settle, sign_extend
+from test_utils import log_header, log_info, log_success, log_error, settle, sign_extend, stress_rng
 
 # =====================================================================================================================
 # CONSTANTES E FUNÇÕES AUXILIARES (RISC-V SPEC)
@@ -34,99 +33,113 @@ OPCODE_JAL      = 0x6F  # 1101111 (JAL)
 # Trata-se da implementação de um modelo comportamental de referência, utilizado como oráculo de 
 # verificação funcional.
 
-def model_imm_gen(instruction):
-    """
-    Simula o hardware ImmGen.
-    Recebe um inteiro de 32 bits (instrução) e retorna o imediato de 32 bits.
-    """
+# Um extrator por formato, despachados por opcode em um dicionário (um lookup por chamada).
+# A extensão de sinal é feita em linha com o idioma (x ^ m) - m, sendo m o bit de sinal do imediato.
 
-    # Extrai o opcode (bits 6:0)
-    opcode = instruction & 0x7F
-    
+# Tabelas de embaralhamento dos formatos B e J. Cada campo bruto da instrução é dividido em
+# duas metades e cada tabela guarda a contribuição da sua metade para o imediato, já com o
+# peso negativo do bit de sinal: imediato = HI[metade alta] + LO[metade baixa].
+
+# B: bits 31:25 -> imm[12] (sinal) e imm[10:5]; bits 11:7 -> imm[4:1] e imm[11]
+_B_IMM_HI = tuple(((x & 0x3F) << 5) - ((x >> 6) << 12) for x in range(1 << 7))
+_B_IMM_LO = tuple((x & 0x1E) | ((x & 1) << 11) for x in range(1 << 5))
+
+# J: bits 31:22 -> imm[20] (sinal) e imm[10:2]; bits 21:12 -> imm[1], imm[11] e imm[19:12]
+_J_IMM_HI = tuple(((x & 0x1FF) << 2) - ((x >> 9) << 20) for x in range(1 << 10))
+_J_IMM_LO = tuple(((x >> 9) << 1) | (((x >> 8) & 1) << 11) | ((x & 0xFF) << 12) for x in range(1 << 10))
+
+def _imm_i(instruction):
     # I-Type: imm[11:0] (Bits 31:20)
-    if opcode == OPCODE_I_TYPE:
-        imm_11_0 = (instruction >> 20) & 0xFFF
-        return sign_extend(imm_11_0, 12)
+    imm_11_0 = (instruction >> 20) & 0xFFF
+    return (imm_11_0 ^ 0x800) - 0x800
 
+def _imm_s(instruction):
     # S-Type: imm[11:5] (31:25) | imm[4:0] (11:7)
-    elif opcode == OPCODE_STORE:
-        imm_11_5 = (instruction >> 25) & 0x7F
-        imm_4_0  = (instruction >> 7)  & 0x1F
-        imm_val  = (imm_11_5 << 5) | imm_4_0
-        return sign_extend(imm_val, 12)
-
-    # B-Type: imm[12]|imm[10:5]|imm[4:1]|imm[11] -> (31, 30:25, 11:8, 7)
-    elif opcode == OPCODE_BRANCH:
-        bit_12    = (instruction >> 31) & 1
-        bit_10_5  = (instruction >> 25) & 0x3F
-        bit_4_1   = (instruction >> 8)  & 0xF
-        bit_11    = (instruction >> 7)  & 1
-        
-        imm_val = (bit_12 << 12) | (bit_11 << 11) | (bit_10_5 << 5) | (bit_4_1 << 1)
-        return sign_extend(imm_val, 13)
+    imm_val = ((instruction >> 20) & 0xFE0) | ((instruction >> 7) & 0x1F)
+    return (imm_val ^ 0x800) - 0x800
+
+def _imm_b(instruction):
+    # B-Type: imm[12]|imm[10:5]|imm[4:1]|imm[11] -> (31, 30:25, 11:8, 7), via tabelas
+    return _B_IMM_HI[(instruction >> 25) & 0x7F] + _B_IMM_LO[(instruction >> 7) & 0x1F]
 
+def _imm_u(instruction):
     # U-Type: imm[31:12] (31:12) << 12
-    elif opcode == OPCODE_LUI:
-        imm_31_12 = (instruction >> 12) & 0xFFFFF
-        val = imm_31_12 << 12
-        return sign_extend(val, 32)
-
-    # J-Type: imm[20]|imm[10:1]|imm[11]|imm[19:12] -> (31, 30:21, 20, 19:12)
-    elif opcode == OPCODE_JAL:
-        bit_20    = (instruction >> 31) & 1
-        bit_10_1  = (instruction >> 21) & 0x3FF
-        bit_11    = (instruction >> 20) & 1
-        bit_19_12 = (instruction >> 12) & 0xFF
-        imm_val = (bit_20 << 20) | (bit_19_12 << 12) | (bit_11 << 11) | (bit_10_1 << 1)
-        return sign_extend(imm_val, 21)
+    return ((instruction & 0xFFFFF000) ^ 0x80000000) - 0x80000000
+
+def _imm_j(instruction):
+    # J-Type: imm[20]|imm[10:1]|imm[11]|imm[19:12] -> (31, 30:21, 20, 19:12), via tabelas
+    return _J_IMM_HI[(instruction >> 22) & 0x3FF] + _J_IMM_LO[(instruction >> 12) & 0x3FF]
 
+def _imm_none(instruction):
     return 0 # Indefinido
 
+_IMM_DECODERS = {
+    OPCODE_I_TYPE: _imm_i,
+    OPCODE_STORE:  _imm_s,
+    OPCODE_BRANCH: _imm_b,
+    OPCODE_LUI:    _imm_u,
+    OPCODE_JAL:    _imm_j,
+}
+
+def model_imm_gen(instruction):
+    """
+    Simula o hardware ImmGen.
+    Recebe um inteiro de 32 bits (instrução) e retorna o imediato de 32 bits.
+    """
+    # Seleciona o extrator pelo opcode (bits 6:0)
+    return _IMM_DECODERS.get(instruction & 0x7F, _imm_none)(instruction)
+
 # =====================================================================================================================
 # BUILDER HELPERS (Para construir instruções de teste)
 # =====================================================================================================================
 
+# Um construtor por formato (mesma assinatura), cada um mascarando apenas os campos que usa
+
+def _make_i(rd, funct3, rs1, rs2, imm):
+    # I-Type: imm[11:0] | rs1 | funct3 | rd | opcode
+    return ((imm & 0xFFF) << 20) | ((rs1 & 0x1F) << 15) | ((funct3 & 0x7) << 12) | ((rd & 0x1F) << 7) | OPCODE_I_TYPE
+
+def _make_s(rd, funct3, rs1, rs2, imm):
+    # S-Type: imm[11:5] | rs2 | rs1 | funct3 | imm[4:0] | opcode
+    imm &= 0xFFF
+    imm_11_5 = (imm >> 5) & 0x7F
+    imm_4_0  = imm & 0x1F
+    return (imm_11_5 << 25) | ((rs2 & 0x1F) << 20) | ((rs1 & 0x1F) << 15) | ((funct3 & 0x7) << 12) | (imm_4_0 << 7) | OPCODE_STORE
+
+def _make_b(rd, funct3, rs1, rs2, imm):
+    # B-Type: imm[12] | imm[10:5] | rs2 | rs1 | funct3 | imm[4:1] | imm[11] | opcode
+    imm &= 0x1FFF # 13 bits
+    b12 = (imm >> 12) & 1
+    b11 = (imm >> 11) & 1
+    b10_5 = (imm >> 5) & 0x3F
+    b4_1  = (imm >> 1) & 0xF
+    return ((b12 << 31) | (b10_5 << 25) | ((rs2 & 0x1F) << 20) | ((rs1 & 0x1F) << 15) |
+            ((funct3 & 0x7) << 12) | (b4_1 << 8) | (b11 << 7) | OPCODE_BRANCH)
+
+def _make_u(rd, funct3, rs1, rs2, imm):
+    # U-Type: imm[31:12] | rd | opcode
+    return (imm & 0xFFFFF000) | ((rd & 0x1F) << 7) | OPCODE_LUI
+
+def _make_j(rd, funct3, rs1, rs2, imm):
+    # J-Type: imm[20] | imm[10:1] | imm[11] | imm[19:12] | rd | opcode
+    # Cada campo é mascarado na posição original e deslocado direto para o destino
+    return (((imm & 0x100000) << 11) | ((imm & 0x7FE) << 20) | ((imm & 0x800) << 9) |
+            (imm & 0xFF000) | ((rd & 0x1F) << 7) | OPCODE_JAL)
+
+def _make_none(rd, funct3, rs1, rs2, imm):
+    return 0
+
+INSTR_BUILDERS = {
+    OPCODE_I_TYPE: _make_i,
+    OPCODE_STORE:  _make_s,
+    OPCODE_BRANCH: _make_b,
+    OPCODE_LUI:    _make_u,
+    OPCODE_JAL:    _make_j,
+}
+
 def make_instr(opcode, rd=0, funct3=0, rs1=0, rs2=0, imm=0):
     """Constrói uma instrução RISC-V baseada no formato e no opcode"""
-    
-    # Garante máscaras
-    rd  &= 0x1F; rs1 &= 0x1F; rs2 &= 0x1F; funct3 &= 0x7
-
-    if opcode == OPCODE_I_TYPE:
-        # I-Type: imm[11:0] | rs1 | funct3 | rd | opcode
-        imm &= 0xFFF
-        return (imm << 20) | (rs1 << 15) | (funct3 << 12) | (rd << 7) | opcode
-
-    elif opcode == OPCODE_STORE:
-        # S-Type: imm[11:5] | rs2 | rs1 | funct3 | imm[4:0] | opcode
-        imm &= 0xFFF
-        imm_11_5 = (imm >> 5) & 0x7F
-        imm_4_0  = imm & 0x1F
-        return (imm_11_5 << 25) | (rs2 << 20) | (rs1 << 15) | (funct3 << 12) | (imm_4_0 << 7) | opcode
-
-    elif opcode == OPCODE_BRANCH:
-        # B-Type: imm[12] | imm[10:5] | rs2 | rs1 | funct3 | imm[4:1] | imm[11] | opcode
-        imm &= 0x1FFF # 13 bits
-        b12 = (imm >> 12) & 1
-        b11 = (imm >> 11) & 1
-        b10_5 = (imm >> 5) & 0x3F
-        b4_1  = (imm >> 1) & 0xF
-        return (b12 << 31) | (b10_5 << 25) | (rs2 << 20) | (rs1 << 15) | (funct3 << 12) | (b4_1 << 8) | (b11 << 7) | opcode
-
-    elif opcode == OPCODE_LUI:
-        imm_upper = (imm >> 12) & 0xFFFFF
-        return (imm_upper << 12) | (rd << 7) | opcode
-
-    elif opcode == OPCODE_JAL:
-        # J-Type: imm[20] | imm[10:1] | imm[11] | imm[19:12] | rd | opcode
-        imm &= 0x1FFFFF # 21 bits
-        b20 = (imm >> 20) & 1
-        b19_12 = (imm >> 12) & 0xFF
-        b11 = (imm >> 11) & 1
-        b10_1 = (imm >> 1) & 0x3FF
-        return (b20 << 31) | (b10_1 << 21) | (b11 << 20) | (b19_12 << 12) | (rd << 7) | opcode
-    
-    return 0
+    return INSTR_BUILDERS.get(opcode, _make_none)(rd, funct3, rs1, rs2, imm)
 
 # =====================================================================================================================
 # FUNÇÃO DE VERIFICAÇÃO
@@ -148,11 +161,17 @@ async def verify_imm(dut, instruction, expected_imm, case_desc):
 
     # Compara com o valor esperado
     if current_imm != expected_imm:
-        log_error(f"FALHA: {case_desc}")
-        log_error(f"Instr Hex : {hex(instruction)}")
-        log_error(f"Esperado  : {expected_imm} ({hex(expected_imm & 0xFFFFFFFF)})")
-        log_error(f"Recebido  : {current_imm} ({hex(current_imm & 0xFFFFFFFF)})")
-        assert False, f"Falha no caso: {case_desc}"
+        report_imm_failure(instruction, expected_imm, current_imm, case_desc)
+
+def report_imm_failure(instruction, expected_imm, observed_imm, case_desc):
+    """
+    Reporta uma divergência já observada no imediato e falha o teste.
+    """
+    log_error(f"FALHA: {case_desc}")
+    log_error(f"Instr Hex : {hex(instruction)}")
+    log_error(f"Esperado  : {expected_imm} ({hex(expected_imm & 0xFFFFFFFF)})")
+    log_error(f"Recebido  : {observed_imm} ({hex(observed_imm & 0xFFFFFFFF)})")
+    assert False, f"Falha no caso: {case_desc}"
 
 # =====================================================================================================================
 # TESTES
@@ -230,56 +249,81 @@ async def stress_test_randomized(dut):
     opcodes = [OPCODE_I_TYPE, OPCODE_STORE, OPCODE_BRANCH, OPCODE_LUI, OPCODE_JAL]
     op_names = {OPCODE_I_TYPE: "I-Type", OPCODE_STORE: "S-Type", OPCODE_BRANCH: "B-Type", OPCODE_LUI: "U-Type", OPCODE_JAL: "J-Type"}
 
-    # Loop de iterações aleatórias 
+    # Gera todo o lote (opcode, instrução, imediato esperado) antes da simulação:
+    # o loop com o DUT abaixo apenas aplica e verifica
+    # Gerador local (semente do cocotb); campos sorteados direto em bits com getrandbits
+    rng     = stress_rng()
+    bits    = rng.getrandbits
+    choose  = rng.choice
+    vectors = []
     for i in range(NUM_ITERATIONS):
 
-        # Escolhe um opcode aleatório
-        opcode = random.choice(opcodes)
+        # Escolhe um opcode aleatório (e o construtor do seu formato)
+        opcode = choose(opcodes)
+        build  = INSTR_BUILDERS[opcode]
         
         # Gera campos aleatórios
-        rd  = random.randint(0, 31)
-        rs1 = random.randint(0, 31)
-        rs2 = random.randint(0, 31)
-        funct3 = random.randint(0, 7)
+        rd  = bits(5)
+        rs1 = bits(5)
+        rs2 = bits(5)
+        funct3 = bits(3)
         
         # Gera imediato aleatório válido para o formato
         imm_val = 0
         instr_word = 0
 
         if opcode == OPCODE_I_TYPE:
-            imm_val = random.randint(-2048, 2047) # 12 bits signed
-            instr_word = make_instr(opcode, rd=rd, rs1=rs1, funct3=funct3, imm=imm_val)
+            imm_val = (bits(12) ^ 0x800) - 0x800 # 12 bits signed
+            instr_word = build(rd, funct3, rs1, rs2, imm_val)
             
         elif opcode == OPCODE_STORE:
-            imm_val = random.randint(-2048, 2047) # 12 bits signed
-            instr_word = make_instr(opcode, rs1=rs1, rs2=rs2, funct3=funct3, imm=imm_val)
+            imm_val = (bits(12) ^ 0x800) - 0x800 # 12 bits signed
+            instr_word = build(rd, funct3, rs1, rs2, imm_val)
             
         elif opcode == OPCODE_BRANCH:
-            imm_val = random.randint(-4096, 4094) & ~1 
-            instr_word = make_instr(opcode, rs1=rs1, rs2=rs2, funct3=funct3, imm=imm_val)
+            imm_val = ((bits(12) ^ 0x800) - 0x800) << 1 # 13 bits signed, par
+            instr_word = build(rd, funct3, rs1, rs2, imm_val)
             
         elif opcode == OPCODE_LUI:
-            raw_val = random.randint(0, 0xFFFFFFFF)
+            raw_val = bits(32)
             expected_imm_val = raw_val & 0xFFFFF000 
             expected_imm_val = sign_extend(expected_imm_val, 32)
-            instr_word = make_instr(opcode, rd=rd, imm=raw_val)
+            instr_word = build(rd, funct3, rs1, rs2, raw_val)
             imm_val = expected_imm_val 
             
         elif opcode == OPCODE_JAL:
-            imm_val = random.randint(-1048576, 1048574) & ~1
-            instr_word = make_instr(opcode, rd=rd, imm=imm_val)
+            imm_val = ((bits(20) ^ 0x80000) - 0x80000) << 1 # 21 bits signed, par
+            instr_word = build(rd, funct3, rs1, rs2, imm_val)
 
-        # Verifica com o modelo Python o imediato esperado
-        model_val = model_imm_gen(instr_word)
-        if model_val != imm_val:
-            log_error(f"ERRO DE LOGICA NO TESTBENCH (Iter {i})")
-            log_error(f"Gerado: {imm_val}, Modelo Python Calculou: {model_val}")
-            assert False, "Testbench Logic Error"
+        vectors.append((opcode, instr_word, imm_val))
 
-        await verify_imm(dut, instr_word, imm_val, f"Random {op_names[opcode]} Iter {i}")
+    # Verifica o lote inteiro contra o modelo Python de uma só vez (antes do loop com o DUT)
+    _, instr_words, imm_vals = zip(*vectors)
+    model_vals = tuple(map(model_imm_gen, instr_words))
+    if model_vals != imm_vals:
+        i = next(k for k, (m, e) in enumerate(zip(model_vals, imm_vals)) if m != e)
+        log_error(f"ERRO DE LOGICA NO TESTBENCH (Iter {i})")
+        log_error(f"Gerado: {imm_vals[i]}, Modelo Python Calculou: {model_vals[i]}")
+        assert False, "Testbench Logic Error"
+
+    # Handles do DUT resolvidos uma única vez, fora do loop
+    instr_in = dut.Instruction_i
+    imm_out  = dut.Immediate_o
+
+    # Loop de iterações aleatórias 
+    for i, (opcode, instr_word, imm_val) in enumerate(vectors):
 
-        # Conta hits por tipo de instrução        
         name = op_names[opcode]
+
+        # Caminho rápido: aplica e compara direto nos handles em cache
+        instr_in.value = instr_word
+        await settle()
+        observed = imm_out.value.to_signed()
+        if observed != imm_val:
+            # Reporta o valor já lido (sem reaplicar a instrução no DUT)
+            report_imm_failure(instr_word, imm_val, observed, f"Random {name} Iter {i}")
+
+        # Conta hits por tipo de instrução        
         hits[name] = hits.get(name, 0) + 1
 
     # Relatório de cobertura de operações
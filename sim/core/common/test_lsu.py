@@ -4,9 +4,17 @@
 # ==============================================================================
 
 import cocotb   # Biblioteca principal do cocotb
+from array import array
+from collections import Counter
+
+# Escrita imediata: o valor é depositado na hora, sem agendar um callback de escrita por sinal
+from cocotb.handle import Immediate
 
 # Importa utilitários compartilhados entre testbenches
-from test_utils import log_header, log_info, log_success, settle
+from test_utils import (
+    log_header, log_info, log_success, log_error, settle, settle_comb, sign_extend, fast_int,
+    stress_iterations, stress_rng
+)
 
 # Funct3 Constants (Baseado no RISC-V ISA)
 F3_LB  = 0b000
@@ -18,6 +26,112 @@ F3_SB  = 0b000
 F3_SH  = 0b001
 F3_SW  = 0b010
 
+# =====================================================================================================================
+# GOLDEN MODEL - Modelo de referência em Python (Load)
+# =====================================================================================================================
+
+# Tabela funct3 -> (Nome, largura em bits, extensão de sinal)
+LOAD_FORMATS = {
+    F3_LB:  ("LB",   8, True),
+    F3_LH:  ("LH",  16, True),
+    F3_LW:  ("LW",  32, False),
+    F3_LBU: ("LBU",  8, False),
+    F3_LHU: ("LHU", 16, False),
+}
+
+def model_load_unit(funct3, addr_lsb, mem_data):
+    """
+    Simula o caminho de LOAD da LSU.
+    Seleciona o byte/half/word pelos LSBs do endereço e aplica extensão de sinal ou de zero.
+    """
+    _, width, signed = LOAD_FORMATS[funct3]
+
+    # Half usa apenas o bit 1 do endereço; Word ignora os dois LSBs
+    shift = (addr_lsb & (0b11 ^ (width // 8 - 1))) * 8
+    value = (mem_data >> shift) & ((1 << width) - 1)
+
+    if signed:
+        value = sign_extend(value, width) & 0xFFFFFFFF
+    return value
+
+# =====================================================================================================================
+# GOLDEN MODEL - Modelo de referência em Python (Store)
+# =====================================================================================================================
+
+STORE_NAMES = {F3_SB: "SB", F3_SH: "SH", F3_SW: "SW"}
+
+# Tabela (funct3, addr_lsb) -> (máscara de WE, máscara do dado de escrita, deslocamento)
+# Substitui o if/elif por uma única consulta + três operações de bits.
+STORE_TABLE = {}
+for _lsb in range(4):
+    STORE_TABLE[(F3_SW, _lsb)] = (0xF, 0xFFFFFFFF, 0)
+    STORE_TABLE[(F3_SH, _lsb)] = (0xC, 0xFFFF, 16) if _lsb & 0b10 else (0x3, 0xFFFF, 0)
+    STORE_TABLE[(F3_SB, _lsb)] = (1 << _lsb, 0xFF, 8 * _lsb)
+
+def model_store_unit(funct3, addr_lsb, write_data):
+    """
+    Simula o caminho de STORE da LSU.
+    Retorna a tupla (máscara de WE, dado alinhado para a RAM).
+    """
+    we, wmask, shift = STORE_TABLE.get((funct3, addr_lsb & 0b11), (0x0, 0x0, 0))
+    return we, (write_data & wmask) << shift
+
+
+# =====================================================================================================================
+# FUNÇÃO DE VERIFICAÇÃO
+# =====================================================================================================================
+
+def store_handles(dut):
+    """Resolve uma única vez os handles do DUT usados por apply_store (fora dos loops)"""
+    return dut.Funct3_i, dut.Addr_i, dut.WriteData_i, dut.DMem_we_o, dut.DMem_data_o
+
+async def apply_store(handles, funct3, addr, write_data):
+    """
+    Aplica um STORE e retorna (WE, dado) lidos do DUT após a estabilização.
+    Recebe os handles já resolvidos por store_handles().
+    """
+    funct3_i, addr_i, write_data_i, we_o, data_o = handles
+
+    # Aplica os estímulos (escrita imediata; um único settle para todos)
+    funct3_i.value     = Immediate(funct3)
+    addr_i.value       = Immediate(addr)
+    write_data_i.value = Immediate(write_data)
+
+    # Aguarda estabilização (LSU é puramente combinacional)
+    await settle_comb()
+
+    return fast_int(we_o), fast_int(data_o)
+
+def check_store(op_name, case_id, addr, write_data, exp_we, exp_data, got_we, got_data):
+    """Compara o resultado lido com o esperado (puramente Python, sem acesso ao DUT)"""
+    if got_we != exp_we or got_data != exp_data:
+        log_error(f"FALHA: {op_name} - caso {case_id}")
+        log_error(f"Addr/Dado : {hex(addr)} / {hex(write_data)}")
+        log_error(f"Esperado  : WE={bin(exp_we)} Data={hex(exp_data)}")
+        log_error(f"Recebido  : WE={bin(got_we)} Data={hex(got_data)}")
+        assert False, f"Falha no caso: {op_name} {case_id}"
+
+def _make_store_verifier(funct3, op_name):
+    """
+    Cria um verificador especializado para um formato de STORE (SB/SH/SW).
+    funct3 e o nome do formato ficam capturados na closure; a descrição
+    do caso só é formatada em caso de falha.
+    """
+
+    async def verify_store(handles, addr, write_data, exp_we, exp_data, case_id):
+        """Aplica um STORE e verifica imediatamente máscara de WE e dado alinhado"""
+        got_we, got_data = await apply_store(handles, funct3, addr, write_data)
+        check_store(op_name, case_id, addr, write_data, exp_we, exp_data, got_we, got_data)
+
+    return verify_store
+
+# Tabela funct3 -> verificador especializado
+STORE_VERIFIERS = {f3: _make_store_verifier(f3, name) for f3, name in STORE_NAMES.items()}
+
+# =====================================================================================================================
+# TESTES
+# =====================================================================================================================
+
 @cocotb.test()
 async def test_lsu_passthrough(dut):
     
@@ -67,37 +181,25 @@ async def test_lsu_loads(dut):
     dut.MemWrite_i.value  = 0         # Leitura
 
     # Tabela de Testes: (Funct3, Endereço_LSB, Valor_Esperado, Nome)
+    # Gerada a partir do modelo: todas as combinações de formato (5) e LSB (4) = 20 casos
     test_cases = [
-        # LW (Word) - Endereço alinhado
-        (F3_LW,  0b00, 0x89ABCDEF, "LW Alinhado"),
-        
-        # LB (Byte com Sinal) - Extensão de sinal
-        (F3_LB,  0b00, 0xFFFFFFEF, "LB Byte 0 (Neg)"),
-        (F3_LB,  0b01, 0xFFFFFFCD, "LB Byte 1 (Neg)"),
-        (F3_LB,  0b10, 0xFFFFFFAB, "LB Byte 2 (Neg)"),
-        (F3_LB,  0b11, 0xFFFFFF89, "LB Byte 3 (Neg)"),
-        
-        # LBU (Byte Sem Sinal) - Extensão de zero
-        (F3_LBU, 0b00, 0x000000EF, "LBU Byte 0"),
-        (F3_LBU, 0b11, 0x00000089, "LBU Byte 3"),
-
-        # LH (Half com Sinal)
-        (F3_LH,  0b00, 0xFFFFCDEF, "LH Half 0"),
-        (F3_LH,  0b10, 0xFFFF89AB, "LH Half 1"),
-
-        # LHU (Half Sem Sinal)
-        (F3_LHU, 0b00, 0x0000CDEF, "LHU Half 0"),
+        (f3, addr_lsb, model_load_unit(f3, addr_lsb, mem_val), f"{name} LSB={addr_lsb:02b}")
+        for f3, (name, _, _) in LOAD_FORMATS.items()
+        for addr_lsb in range(4)
     ]
 
+    # Handles resolvidos uma única vez, fora do loop
+    funct3_i, addr_i, load_data_o = dut.Funct3_i, dut.Addr_i, dut.LoadData_o
+
     # Loop de iteração do vetor de testes
     for f3, addr_lsb, expected, name in test_cases:
 
-        dut.Funct3_i.value = f3
-        dut.Addr_i.value   = addr_lsb 
+        funct3_i.value = Immediate(f3)
+        addr_i.value   = Immediate(addr_lsb)
         
-        await settle()
+        await settle_comb()
         
-        got = int(dut.LoadData_o.value)
+        got = fast_int(load_data_o)
         
         assert got == expected, f"FALHA {name}: Esperado {hex(expected)}, Obtido {hex(got)}"
         log_info(f"OK: {name}")
@@ -147,26 +249,71 @@ async def test_lsu_stores(dut):
         (F3_SB, 0b11, 0x8, 0x44000000, "SB Byte 3"),
     ]
 
-    # Loop de iteração do vetor de testes
+    # Completa a tabela com as combinações restantes (3 formatos x 4 LSBs = 12), geradas pelo modelo
+    dirigidos = {(f3, addr_lsb) for f3, addr_lsb, *_ in test_cases}
+    test_cases += [
+        (f3, addr_lsb, *model_store_unit(f3, addr_lsb, val_to_write), f"{name} LSB={addr_lsb:02b} (Modelo)")
+        for f3, name in STORE_NAMES.items()
+        for addr_lsb in range(4)
+        if (f3, addr_lsb) not in dirigidos
+    ]
+
+    # Loop de iteração do vetor de testes (mesmo caminho de verificação do stress test)
+    # Nota: o VHDL atribui '0' aos bytes inativos (DMem_data_o <= (others => '0') por padrão),
+    # portanto podemos comparar o valor inteiro exato.
+    handles = store_handles(dut)
     for f3, addr_lsb, exp_we, exp_data, name in test_cases:
-        
-        dut.Funct3_i.value = f3
-        dut.Addr_i.value   = addr_lsb
-        
-        await settle()
-        
-        got_we   = int(dut.DMem_we_o.value)
-        got_data = int(dut.DMem_data_o.value)
+        await STORE_VERIFIERS[f3](handles, addr_lsb, val_to_write, exp_we, exp_data, name)
+        log_info(f"OK: {name}")
+    
+    log_success("Vetor de testes de STORE realizado com sucesso!")
 
-        # Verificação da Máscara de Escrita (WE)
-        assert got_we == exp_we, f"FALHA {name} (WE): Esperado {bin(exp_we)}, Obtido {bin(got_we)}"
 
-        # Verificação do Dado (Verificamos apenas os bytes ativos na máscara)
-        # Nota: O VHDL atribui '0' aos bytes inativos ou mantém indefinido? 
-        # No código sugerido anteriormente: DMem_data_o <= (others => '0') por padrão.
-        # Portanto, podemos comparar o valor inteiro exato.
-        assert got_data == exp_data, f"FALHA {name} (Data): Esperado {hex(exp_data)}, Obtido {hex(got_data)}"
+@cocotb.test()
+async def stress_test_randomized(dut):
 
-        log_info(f"OK: {name}")
-    
-    log_success("Vetor de testes de STORE realizado com sucesso!")
\ No newline at end of file
+    # Gera STOREs aleatórios e compara com o modelo Python
+
+    # Número de iterações aleatórias (dividido entre as simulações se STRESS_SHARDS > 1)
+    NUM_ITERATIONS = stress_iterations(5000)
+
+    # Escreve cabeçalho do teste
+    log_header(f"Stress Test Randomized - STORE ({NUM_ITERATIONS} iterações)")
+
+    op_names = STORE_NAMES
+    funct3s  = list(op_names)
+
+    # Todo o estímulo (e o resultado esperado) é gerado antes do loop:
+    # no loop restam apenas a aplicação no DUT e a comparação.
+    # Gerador local com a semente do cocotb (reprodutível); palavras de 32 bits geradas em bloco.
+    rng      = stress_rng()
+    f3_vec   = rng.choices(funct3s, k=NUM_ITERATIONS)
+    addr_vec = array('I', rng.randbytes(4 * NUM_ITERATIONS))
+    wd_vec   = array('I', rng.randbytes(4 * NUM_ITERATIONS))
+
+    # Golden model calculado de uma vez, antes da simulação (o modelo já isola os 2 LSBs do endereço)
+    exp_vec  = list(map(model_store_unit, f3_vec, addr_vec, wd_vec))
+
+    dut.MemWrite_i.value  = 1
+    dut.DMem_data_i.value = 0
+
+    # Handles resolvidos uma única vez, fora do loop
+    handles = store_handles(dut)
+
+    # Loop de iterações aleatórias: apenas aplica e captura (WE, dado).
+    # A LSU é combinacional (um único conjunto de entradas), então não há como
+    # sobrepor iterações no DUT; o que sai do caminho crítico é a comparação.
+    got_vec = [await apply_store(handles, f3, addr, wd) for f3, addr, wd in zip(f3_vec, addr_vec, wd_vec)]
+
+    # Comparação em bloco após a simulação (reporta a primeira divergência)
+    if got_vec != exp_vec:
+        for i, (f3, addr, wd, exp, got) in enumerate(zip(f3_vec, addr_vec, wd_vec, exp_vec, got_vec)):
+            check_store(op_names[f3], i, addr, wd, *exp, *got)
+
+    # Relatório de cobertura de operações (contagem em uma única passada sobre o estímulo)
+    hits = Counter(f3_vec)
+    for f3, op in op_names.items():
+        log_info(f"{op:<5}: {hits[f3]} vezes")
+
+    # Escreve mensagem de sucesso do teste
+    log_success(f"{NUM_ITERATIONS} Vetores Aleatórios Verificados com Sucesso")
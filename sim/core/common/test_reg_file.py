@@ -8,10 +8,10 @@
 #
 # ============================================================================================================================================================
 
-import cocotb                            # Biblioteca principal do cocotb
-from cocotb.clock import Clock           # Utilitário para geração de clock
-from cocotb.triggers import RisingEdge   # Triggers para eventos de simulação
-import random                            # Para gerar valores aleatórios nos testes
+import cocotb                                        # Biblioteca principal do cocotb
+from cocotb.clock import Clock                       # Utilitário para geração de clock
+from cocotb.triggers import RisingEdge, ClockCycles  # Triggers para eventos de simulação
+import random                                        # Para gerar valores aleatórios nos testes
 
 # Importa utilitários compartilhados entre testbenches
 from test_utils import log_header, log_info, log_success, log_error, settle
@@ -104,9 +104,8 @@ async def run_directed_tests(dut):
     dut.WriteAddr_i.value = 0
     dut.WriteData_i.value = 0
     
-    # Espera alguns clocks para estabilizar
-    await RisingEdge(dut.clk_i)
-    await RisingEdge(dut.clk_i)
+    # Espera alguns clocks para estabilizar (um único trigger para as duas bordas)
+    await ClockCycles(dut.clk_i, 2)
 
     # -------------------------------------------------------------------------
     # Teste 1: Escrever 42 em x5
@@ -8,12 +8,14 @@
 # ================================================================================================================
 
 import cocotb
+import logging
 import random
+from array import array
 from cocotb.clock import Clock
 from cocotb.triggers import RisingEdge
 
 # Importa utilitários personalizados
-from test_utils import log_header, log_info, log_success, log_error, settle, Colors
+from test_utils import log_header, log_info, log_success, log_error, settle, fast_int, Colors
 
 # =================================================================================================
 # Finite State Machine (IF)
@@ -43,24 +45,45 @@ g_saidas = {
 # A lógica para percorrer a FSM será encapsulada em FSMRunner, para limpar os testes
 
 class FSMRunner:
+
+    # Ordem dos sinais de saída (mesma ordem dos parâmetros de drive_control)
+    SAIDAS = ('pcw', 'irw', 'opcw', 'pcsrc')
+
     def __init__(self, estado_inicial, f_transicao, g_saidas):
-        """Define o estado iinicial e as funções de transição e saída"""
-        self.estado = estado_inicial
-        self.f_transicao = f_transicao
-        self.g_saidas = g_saidas
+        """
+        Define o estado inicial e pré-compila as funções de transição e saída
+        em tuplas indexadas pelo id inteiro do estado (sem dicts por tick).
+        """
+        self.nomes = tuple(f_transicao)
+        ids = {nome: i for i, nome in enumerate(self.nomes)}
+
+        # Transições: por estado, tupla de (condição, id do próximo). 'always' vira condição None
+        self._next = tuple(
+            tuple((None if cond == 'always' else cond, ids[prox]) for cond, prox in f_transicao[nome].items())
+            for nome in self.nomes
+        )
+
+        # Saídas: por estado, tupla (pcw, irw, opcw, pcsrc)
+        self._out = tuple(
+            tuple(g_saidas[nome].get(sinal, 0) for sinal in self.SAIDAS)
+            for nome in self.nomes
+        )
+
+        self._estado = ids[estado_inicial]
+
+    @property
+    def estado(self):
+        """Nome do estado atual"""
+        return self.nomes[self._estado]
 
     def sinais(self):
         """Saídas do estado atual (Moore)"""
-        return self.g_saidas[self.estado]
+        return self._out[self._estado]
 
     def proximo_estado(self, entradas):
-        """A partir das entradas, leva a FSM ao próximo estado"""
-        transicoes = self.f_transicao[self.estado]
-
-        for cond, prox in transicoes.items():
-            if cond == 'always':
-                return prox
-            if cond in entradas and entradas[cond]:
+        """A partir das entradas, retorna o id do próximo estado da FSM"""
+        for cond, prox in self._next[self._estado]:
+            if cond is None or entradas.get(cond):
                 return prox
 
         raise RuntimeError(f"Sem transição válida para {self.estado}")
@@ -76,14 +99,14 @@ class FSMRunner:
             entradas = {}
 
         # 1. Aplica sinais do estado atual
-        await drive_control(dut, **self.sinais())
+        await drive_control(dut, *self.sinais())
 
         # 2. Clock
         await RisingEdge(dut.CLK_i)
         await settle()
 
         # 3. Avança estado
-        self.estado = self.proximo_estado(entradas)
+        self._estado = self.proximo_estado(entradas)
 
 # =================================================================================================
 # Helpers de Monitoramento e Setup
@@ -94,9 +117,9 @@ class IFMonitor:
     @staticmethod
     def decodificar_sinais_controle(dut):
         """Traduz os sinais de controle brutos para texto descritivo"""
-        pc_w  = int(dut.pcwrite_i.value)
-        ir_w  = int(dut.irwrite_i.value)
-        opc_w = int(dut.opcwrite_i.value)
+        pc_w  = fast_int(dut.pcwrite_i)
+        ir_w  = fast_int(dut.irwrite_i)
+        opc_w = fast_int(dut.opcwrite_i)
         
         acoes = []
         if pc_w:  acoes.append("ATUALIZA_PC")
@@ -108,24 +131,30 @@ class IFMonitor:
         return " + ".join(acoes)
 
     @staticmethod
-    def log_status_ciclo(dut, nome_passo):
-        """Imprime uma tabela formatada do estado atual do datapath"""
-        
+    def log_status_ciclo(dut, nome_passo, nivel=logging.DEBUG):
+        """
+        Imprime uma tabela formatada do estado atual do datapath.
+        A tabela só é montada (leituras + formatação) se o nível de log estiver habilitado.
+        """
+        log = cocotb.log
+        if not log.isEnabledFor(nivel):
+            return
+
         # 1. Captura dados de estado do datapath 
-        r_pc     = int(dut.DBG_r_pc_o.value)      # PC Atual
-        r_oldpc  = int(dut.DBG_r_opc_o.value)     # Old PC
-        r_ir     = int(dut.DBG_r_ir_o.value)      # Instruction Register
-        pc_next  = int(dut.DBG_pc_next_o.value)   # Lógica Combinacional do Próximo PC
+        r_pc     = fast_int(dut.DBG_r_pc_o)      # PC Atual
+        r_oldpc  = fast_int(dut.DBG_r_opc_o)     # Old PC
+        r_ir     = fast_int(dut.DBG_r_ir_o)      # Instruction Register
+        pc_next  = fast_int(dut.DBG_pc_next_o)   # Lógica Combinacional do Próximo PC
         
         # 2. Captura os dados da interface de memória (IMem)
-        mem_addr = int(dut.IMem_addr_o.value)
-        mem_data = int(dut.IMem_data_i.value)
+        mem_addr = fast_int(dut.IMem_addr_o)
+        mem_data = fast_int(dut.IMem_data_i)
 
         # 3. Captura sinais de controle no instante (snapshot) 
-        c_pcw   = int(dut.pcwrite_i.value)
-        c_irw   = int(dut.irwrite_i.value)
-        c_opcw  = int(dut.opcwrite_i.value)
-        c_pcsrc = int(dut.pcsrc_i.value)
+        c_pcw   = fast_int(dut.pcwrite_i)
+        c_irw   = fast_int(dut.irwrite_i)
+        c_opcw  = fast_int(dut.opcwrite_i)
+        c_pcsrc = fast_int(dut.pcsrc_i)
 
         # Informa os sinais e a execução no momento
         raw_ctrl_str = f"PCWrite:{c_pcw} | IRWrite:{c_irw} | OPCWrite:{c_opcw} | PCSrc:{c_pcsrc:02b}"
@@ -139,57 +168,79 @@ class IFMonitor:
         C_RST = Colors.ENDC
 
         # Tabela que reune todas as informações anteriores para o usuário
-        cocotb.log.info(f"\n{Colors.INFO}{'='*80}{C_RST}")
-        cocotb.log.info(f" ⏱️  PASSO: {Colors.BOLD}{nome_passo}{C_RST}")
-        cocotb.log.info(f" 🎮 CTRL : {C_WRN}[ {micro_ops} ]{C_RST}")
-        cocotb.log.info(f" 🎛️  RAW  : {C_INF}{raw_ctrl_str}{C_RST}")
-        cocotb.log.info(f"{Colors.INFO}{'-'*80}{C_RST}")
-        cocotb.log.info(f"  {C_LBL}REGISTRADORES{C_RST} | PC      : {C_VAL}0x{r_pc:08X}{C_RST}  (Próx: {C_WRN}0x{pc_next:08X}{C_RST})")
-        cocotb.log.info(f"                | OldPC   : {C_VAL}0x{r_oldpc:08X}{C_RST}")
-        cocotb.log.info(f"                | IR      : {C_VAL}0x{r_ir:08X}{C_RST}")
-        cocotb.log.info(f"  {C_LBL}MEMORIA BUS  {C_RST} | Endereço: {C_WRN}0x{mem_addr:08X}{C_RST}  ->  DadoLido: {C_VAL}0x{mem_data:08X}{C_RST}")
-        cocotb.log.info(f"{Colors.INFO}{'='*80}{C_RST}\n")
+        log.log(nivel, f"\n{Colors.INFO}{'='*80}{C_RST}")
+        log.log(nivel, f" ⏱️  PASSO: {Colors.BOLD}{nome_passo}{C_RST}")
+        log.log(nivel, f" 🎮 CTRL : {C_WRN}[ {micro_ops} ]{C_RST}")
+        log.log(nivel, f" 🎛️  RAW  : {C_INF}{raw_ctrl_str}{C_RST}")
+        log.log(nivel, f"{Colors.INFO}{'-'*80}{C_RST}")
+        log.log(nivel, f"  {C_LBL}REGISTRADORES{C_RST} | PC      : {C_VAL}0x{r_pc:08X}{C_RST}  (Próx: {C_WRN}0x{pc_next:08X}{C_RST})")
+        log.log(nivel, f"                | OldPC   : {C_VAL}0x{r_oldpc:08X}{C_RST}")
+        log.log(nivel, f"                | IR      : {C_VAL}0x{r_ir:08X}{C_RST}")
+        log.log(nivel, f"  {C_LBL}MEMORIA BUS  {C_RST} | Endereço: {C_WRN}0x{mem_addr:08X}{C_RST}  ->  DadoLido: {C_VAL}0x{mem_data:08X}{C_RST}")
+        log.log(nivel, f"{Colors.INFO}{'='*80}{C_RST}\n")
 
 # =================================================================================================
 # Drivers e Modelos
 # =================================================================================================
 
+# Último valor escrito em cada sinal de controle (sombra do lado Python).
+# Os sinais só são escritos quando o valor muda, evitando escritas repetidas via GPI a cada tick.
+_control_shadow = {}
+
+def _set_control(sig, val):
+    """Escreve no sinal apenas se o valor difere da última escrita"""
+    if _control_shadow.get(sig) != val:
+        sig.value = val
+        _control_shadow[sig] = val
+
 async def drive_control(dut, pcw=0, irw=0, opcw=0, pcsrc=0):
     """Função auxiliar que configura os sinais de controle do Fetch e zera os demais."""
 
     # Variáveis de interesse para o teste
-    dut.pcwrite_i.value    = pcw
-    dut.irwrite_i.value    = irw
-    dut.opcwrite_i.value   = opcw
-    dut.pcsrc_i.value      = pcsrc
+    _set_control(dut.pcwrite_i,    pcw)
+    _set_control(dut.irwrite_i,    irw)
+    _set_control(dut.opcwrite_i,   opcw)
+    _set_control(dut.pcsrc_i,      pcsrc)
     
     # Zera sinais irrelevantes (não são de interesse para o teste)
-    dut.reg_write_i.value  = 0
-    dut.alu_src_a_i.value  = 0
-    dut.alu_src_b_i.value  = 0
-    dut.mem_write_i.value  = 0
-    dut.wb_src_i.value     = 0
-    dut.alucontrol_i.value = 0
-    dut.rs1write_i.value   = 0
-    dut.rs2write_i.value   = 0
-    dut.aluwrite_i.value   = 0
-    dut.mdrwrite_i.value   = 0
+    # Após o primeiro tick, estas escritas deixam de chegar ao simulador
+    _set_control(dut.reg_write_i,  0)
+    _set_control(dut.alu_src_a_i,  0)
+    _set_control(dut.alu_src_b_i,  0)
+    _set_control(dut.mem_write_i,  0)
+    _set_control(dut.wb_src_i,     0)
+    _set_control(dut.alucontrol_i, 0)
+    _set_control(dut.rs1write_i,   0)
+    _set_control(dut.rs2write_i,   0)
+    _set_control(dut.aluwrite_i,   0)
+    _set_control(dut.mdrwrite_i,   0)
 
 class ModeloMemoria:
+
+    # Espaço de instruções: 16K palavras (64KB), endereçado por palavra
+    MEM_WORDS = 1 << 14
+
     def __init__(self, dut):
         """Inicializa a memória vazia para o DUT"""
         self.dut = dut
-        self.mem = {}
+        # Vetor plano de palavras de 32 bits: leitura é indexação direta (sem hash de dict)
+        self.mem = array('I', bytes(4 * self.MEM_WORDS))
 
     def carregar_programa(self, program_dict):
         """Carrega dados de programa (instruções) na memória para o DUT"""
-        self.mem.update(program_dict)
+        for addr, val in program_dict.items():
+            index = addr >> 2
+            # Fora do espaço modelado: rejeita (sem wraparound silencioso sobre outra palavra)
+            assert 0 <= index < self.MEM_WORDS, f"Endereço 0x{addr:08X} fora da memória modelada (64KB)"
+            self.mem[index] = val
         log_info(f"Modelo de Memória: Carregado com {len(program_dict)} instruções.")
 
     def ler(self, addr):
         """Simula a leitura do dado da memória (instrução)"""
-        val = int(addr) & 0xFFFFFFFC 
-        return self.mem.get(val, 0)
+        # O alinhamento (addr & ~3) é absorvido pelo índice de palavra (addr >> 2)
+        # Fora da memória modelada (ou palavra não carregada) retorna 0
+        index = int(addr) >> 2
+        return self.mem[index] if index < self.MEM_WORDS else 0
 
     async def rodar_loop_imem(self):
         """
@@ -334,9 +385,9 @@ async def test_full_fetch_cycle(dut):
     IFMonitor.log_status_ciclo(dut, "APÓS IF_ADDR")
 
     # Nada deve ter mudado ainda
-    assert int(dut.DBG_r_pc_o.value)  == 0
-    assert int(dut.DBG_r_ir_o.value)  == 0
-    assert int(dut.DBG_r_opc_o.value) == 0
+    assert fast_int(dut.DBG_r_pc_o)  == 0
+    assert fast_int(dut.DBG_r_ir_o)  == 0
+    assert fast_int(dut.DBG_r_opc_o) == 0
 
     # =========================
     # Ciclo 2 — IF_DATA
@@ -347,10 +398,10 @@ async def test_full_fetch_cycle(dut):
     IFMonitor.log_status_ciclo(dut, "APÓS IF_DATA")
 
     # Captura dos registradores
-    ir_atual   = int(dut.DBG_r_ir_o.value)
-    pc_atual   = int(dut.DBG_r_pc_o.value)
-    opc_atual  = int(dut.DBG_r_opc_o.value)
-    inst_atual = int(dut.DBG_instruction_o.value)
+    ir_atual   = fast_int(dut.DBG_r_ir_o)
+    pc_atual   = fast_int(dut.DBG_r_pc_o)
+    opc_atual  = fast_int(dut.DBG_r_opc_o)
+    inst_atual = fast_int(dut.DBG_instruction_o)
 
     # =====================================================================
     # Verificações
@@ -369,11 +420,13 @@ async def test_stress_fetch(dut):
     # [IF] Stress Test: Simula 20 ciclos de Fetch consecutivos
     log_header("TESTE 04: Stress Test (Fetch Contínuo)")
     
-    # Gera dados aleatórios para a memória
+    # Gera dados aleatórios para a memória e as tabelas esperadas (pré-computadas)
     N_INSTRUCOES = 20
-    prog_random = {}
-    for i in range(N_INSTRUCOES):
-        prog_random[i * 4] = random.randint(1, 0xFFFFFFFF)
+    expected_ir  = [random.randint(1, 0xFFFFFFFF) for _ in range(N_INSTRUCOES)]
+    expected_pc  = [(i + 1) * 4 for i in range(N_INSTRUCOES)]   # PC após cada fetch
+    expected_opc = [i * 4 for i in range(N_INSTRUCOES)]         # OldPC = PC da instrução buscada
+
+    prog_random = {i * 4: instr for i, instr in enumerate(expected_ir)}
     prog_random[N_INSTRUCOES * 4] = 0x00000013 # NOP Final
 
     # Inicializa a memória carregando dados aleatórios
@@ -386,11 +439,15 @@ async def test_stress_fetch(dut):
         g_saidas=g_saidas
     )
 
-    # Iteração para verificação do fetch de todas as instruções aleatórias
+    # Iteração para o fetch de todas as instruções aleatórias
+    # O loop apenas captura os valores; a verificação é feita em bloco ao final
     log_info(f"Iniciando loop de {N_INSTRUCOES} instruções...")
-    pc_esperado = 0
+    got_ir, got_pc, got_opc, got_inst = [], [], [], []
+
+    # Handles resolvidos uma única vez, fora do loop
+    r_pc, r_ir, r_opc, instr_o = dut.DBG_r_pc_o, dut.DBG_r_ir_o, dut.DBG_r_opc_o, dut.DBG_instruction_o
 
-    for i in range(N_INSTRUCOES):
+    for _ in range(N_INSTRUCOES):
 
         # Estado IF_ADDR inicial do ciclo IF
         await fsm.tick(dut)
@@ -398,36 +455,31 @@ async def test_stress_fetch(dut):
         # Estado IF_DATA do ciclo IF (carrega dados)
         await fsm.tick(dut)
 
-        # Verifica a instrução esperada de acordo com o incremento do pc_esperado
-        instr_esperada = prog_random[pc_esperado]
-        
         # Captura os sinais de estado do estágio IF do datapath
-        pc_obtido   = int(dut.DBG_r_pc_o.value)
-        ir_obtido   = int(dut.DBG_r_ir_o.value)
-        opc_obtido  = int(dut.DBG_r_opc_o.value)
-        inst_obtido = int(dut.DBG_instruction_o.value)
-        
-        if ir_obtido != instr_esperada:
-            log_error(f"[Ciclo {i}] Falha de IR! PC Esperado na captura: 0x{pc_esperado:08X}")
-            log_error(f"   Esperado: 0x{instr_esperada:08X}")
-            log_error(f"   Obtido  : 0x{ir_obtido:08X}")
-            IFMonitor.log_status_ciclo(dut, "FALHA NO STRESS TEST")
-            assert False, "Dados do IR inconsistentes (Race Condition?)"
-
-        if pc_obtido != (pc_esperado + 4):
-            log_error(f"[Ciclo {i}] Falha de PC! PC perdeu sincronismo.")
-            assert False
-
-        if opc_obtido != (pc_obtido - 4):
-            log_error(f"[Ciclo {i}] OldPC incorreto. Esperado: 0, Recebido: {opc_obtido}")
-            assert False
-            
-        if inst_obtido != ir_obtido:
-            log_error(f"[Ciclo {i}] Instrução incorreta. Esperado: 0x{ir_obtido:08X}, Recebido: 0x{inst_obtido:08X}")
-            assert False
-        
-        # Incrementa PC + 4 para a próxima instrução
-        pc_esperado += 4
+        got_pc.append(fast_int(r_pc))
+        got_ir.append(fast_int(r_ir))
+        got_opc.append(fast_int(r_opc))
+        got_inst.append(fast_int(instr_o))
+
+    # Verificação em bloco: (nome, obtido, esperado)
+    checks = [
+        ("IR",        got_ir,   expected_ir),
+        ("PC",        got_pc,   expected_pc),
+        ("OldPC",     got_opc,  expected_opc),
+        ("Instrução", got_inst, got_ir),
+    ]
+
+    for nome, obtido, esperado in checks:
+        if obtido != esperado:
+            # Reporta apenas a primeira divergência
+            i = next(i for i, (o, e) in enumerate(zip(obtido, esperado)) if o != e)
+            log_error(f"[Ciclo {i}] Falha de {nome}! PC da instrução: 0x{expected_opc[i]:08X}")
+            log_error(f"   Esperado: 0x{esperado[i]:08X}")
+            log_error(f"   Obtido  : 0x{obtido[i]:08X}")
+            # Estado capturado no próprio ciclo da falha (o DUT já avançou até o último ciclo)
+            log_error(f"   [Ciclo {i}] PC=0x{got_pc[i]:08X} OldPC=0x{got_opc[i]:08X} "
+                      f"IR=0x{got_ir[i]:08X} Instr=0x{got_inst[i]:08X}")
+            assert False, f"{nome} inconsistente no ciclo {i}"
 
     # Escreve mensagem de sucesso do teste
-    log_success(f"Stress Test OK: {N_INSTRUCOES} instruções processadas com sucesso.")
\ No newline at end of file
+    log_success(f"Stress Test OK: {N_INSTRUCOES} instruções processadas com sucesso.")
@@ -0,0 +1,72 @@
+---------------------------------------------------------------------------------------------------
+-- File: processor_clk_wrapper.vhd
+-- Descrição: Wrapper para o Processor Top (multi-cycle) com clock gerado no próprio HDL.
+--            Expõe a mesma interface do processor_top, exceto CLK_i, que vira um sinal interno
+--            (ainda visível ao testbench como dut.CLK_i). Evita o toggle do clock em Python.
+--            Uso: make cocotb TOP=processor_clk_wrapper USE_PY_CLOCK=0 SW=<programa>
+---------------------------------------------------------------------------------------------------
+
+library ieee;
+use ieee.std_logic_1164.all;
+
+entity processor_clk_wrapper is
+    generic (
+        CLK_PERIOD : time := 10 ns                            -- 100MHz (mesmo período do testbench)
+    );
+    port (
+        Reset_i             : in  std_logic;
+
+        -- Memória de instruções (IMEM)
+        IMem_addr_o         : out std_logic_vector(31 downto 0);
+        IMem_data_i         : in  std_logic_vector(31 downto 0);
+
+        -- Memória de dados (DMEM)
+        DMem_addr_o         : out std_logic_vector(31 downto 0);
+        DMem_data_o         : out std_logic_vector(31 downto 0);
+        DMem_data_i         : in  std_logic_vector(31 downto 0);
+        DMem_we_o           : out std_logic_vector( 3 downto 0);
+
+        -- Handshake
+        IMem_rdy_i          : in  std_logic;
+        IMem_vld_o          : out std_logic;
+        DMem_rdy_i          : in  std_logic;
+        DMem_vld_o          : out std_logic;
+
+        -- Interrupções
+        Irq_External_i      : in  std_logic;
+        Irq_Timer_i         : in  std_logic;
+        Irq_Software_i      : in  std_logic
+    );
+end entity processor_clk_wrapper;
+
+architecture sim of processor_clk_wrapper is
+
+    -- Clock gerado internamente (o testbench sincroniza nas bordas deste sinal)
+    signal CLK_i : std_logic := '0';
+
+begin
+
+    -- Gerador de clock
+    CLK_i <= not CLK_i after CLK_PERIOD / 2;
+
+    -- Instância do Processador
+    DUT: entity work.processor_top
+        port map (
+            CLK_i               => CLK_i,
+            Reset_i             => Reset_i,
+            IMem_addr_o         => IMem_addr_o,
+            IMem_data_i         => IMem_data_i,
+            DMem_addr_o         => DMem_addr_o,
+            DMem_data_o         => DMem_data_o,
+            DMem_data_i         => DMem_data_i,
+            DMem_we_o           => DMem_we_o,
+            IMem_rdy_i          => IMem_rdy_i,
+            IMem_vld_o          => IMem_vld_o,
+            DMem_rdy_i          => DMem_rdy_i,
+            DMem_vld_o          => DMem_vld_o,
+            Irq_External_i      => Irq_External_i,
+            Irq_Timer_i         => Irq_Timer_i,
+            Irq_Software_i      => Irq_Software_i
+        );
+
+end architecture sim;
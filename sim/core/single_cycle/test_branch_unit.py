@@ -25,6 +25,10 @@ F3_BGE  = 0b101
 F3_BLTU = 0b110
 F3_BGEU = 0b111
 
+# Máscaras de classe de funct3 (bit 1 << funct3): pertinência com um shift e um AND
+F3_LT_MASK = (1 << F3_BLT) | (1 << F3_BLTU)   # BLT / BLTU
+F3_GE_MASK = (1 << F3_BGE) | (1 << F3_BGEU)   # BGE / BGEU
+
 NAMES = {
     F3_BEQ: "BEQ", F3_BNE: "BNE", 
     F3_BLT: "BLT", F3_BGE: "BGE", 
@@ -71,14 +75,14 @@ def model_branch_unit(branch_en, funct3, alu_zero):
     # Se A < B, Resultado = 1 (Non-Zero) -> Zero_Flag = 0
     # Se A >= B, Resultado = 0 (Zero)    -> Zero_Flag = 1
     # Portanto, Taken se Zero_Flag = 0.
-    elif funct3 in [F3_BLT, F3_BLTU]:
+    elif (1 << funct3) & F3_LT_MASK:
         return 0 if alu_zero else 1
 
     # BGE / BGEU: A >= B.
     # A ALU executa SLT/SLTU.
     # Se A >= B, Resultado = 0 (Zero)    -> Zero_Flag = 1
     # Portanto, Taken se Zero_Flag = 1.
-    elif funct3 in [F3_BGE, F3_BGEU]:
+    elif (1 << funct3) & F3_GE_MASK:
         return 1 if alu_zero else 0
     
     return 0 # Padrão (Indefinido)
@@ -9,12 +9,13 @@
 
 import cocotb   # Biblioteca principal do cocotb
 import random   # Para gerar valores aleatórios nos testes
+from functools import lru_cache   # Memoização do modelo de referência
 
 # Importa utilitários compartilhados entre testbenches
 from test_utils import (
     OP_R_TYPE, OP_I_TYPE, OP_LOAD, OP_STORE, OP_BRANCH,
     OP_JAL, OP_JALR, OP_LUI, OP_AUIPC, log_header, 
-    log_info, log_success, log_error, settle
+    log_info, log_success, log_error, settle, stress_rng
 )
 
 # Mapeamento para logs mais legíveis
@@ -25,6 +26,11 @@ BRANCH_NAMES = {0: "BEQ", 1: "BNE", 4: "BLT", 5: "BGE", 6: "BLTU", 7: "BGEU"}
 # =====================================================================================================================
 
 class ControlExpected:
+
+    # Campos fixos: sem __dict__ por instância (criação e comparação mais baratas)
+    __slots__ = ("reg_write", "alu_src_a", "alu_src_b", "mem_to_reg", "mem_write",
+                 "write_data_src", "pcsrc", "alucontrol")
+
     def __init__(self, rw=0, src_a=0, src_b=0, m2r=0, mw=0, wds=0, pcsrc=0, aluc=0):
         """Representa os sinais de controle esperados."""
         self.reg_write = rw
@@ -36,9 +42,14 @@ class ControlExpected:
         self.pcsrc = pcsrc
         self.alucontrol = aluc
 
+    def _key(self):
+        """Tupla com todos os sinais, na ordem dos campos."""
+        return (self.reg_write, self.alu_src_a, self.alu_src_b, self.mem_to_reg,
+                self.mem_write, self.write_data_src, self.pcsrc, self.alucontrol)
+
     def __eq__(self, other):
         """Operador de igualdade para comparação direta."""
-        return self.__dict__ == other.__dict__
+        return self._key() == other._key()
 
     def __str__(self):
         """Representação em string para logging."""
@@ -46,12 +57,27 @@ class ControlExpected:
                 f"M2R={self.mem_to_reg} MW={self.mem_write} WDS={self.write_data_src} "
                 f"PCSrc={self.pcsrc} ALUC={self.alucontrol}")
 
+# Tabelas de decodificação (construídas uma única vez, indexadas por funct3)
+
+# Branch (ALUOp = 01): BEQ/BNE -> SUB, BLT/BGE -> SLT, BLTU/BGEU -> SLTU (funct3 2/3 indefinidos -> 0)
+ALUC_BRANCH = (8, 8, 0, 0, 2, 2, 3, 3)
+
+# R-Type (ALUOp = 10) e I-Type (ALUOp = 11), indexadas por [funct7[5]][funct3]
+ALUC_R_TYPE = ((0, 1, 2, 3, 4, 5, 6, 7), (8, 1, 2, 3, 4, 13, 6, 7))    # SUB e SRA com funct7[5] = 1
+ALUC_I_TYPE = ((0, 1, 2, 3, 4, 5, 6, 7), (0, 1, 2, 3, 4, 13, 6, 7))    # Apenas SRAI (não existe SUBI)
+
+# Branch Unit: valor de ALU_Zero que faz o desvio ser tomado (None = funct3 inválido, nunca desvia)
+BRANCH_TAKEN_ZERO = (1, 0, None, None, 0, 1, 0, 1)
+
 def model_control(instruction, alu_zero):
     """Modelo de referência para o caminho de controle."""
-    opcode = instruction & 0x7F
-    f3 = (instruction >> 12) & 0x07
-    f7_5 = (instruction >> 30) & 0x01
+    # Só opcode, funct3, funct7[5] e ALU_Zero afetam a saída (4096 combinações possíveis):
+    # o resultado é memoizado por esses campos e os demais bits da instrução são ignorados
+    return _model_control(instruction & 0x7F, (instruction >> 12) & 0x07, (instruction >> 30) & 0x01, alu_zero)
 
+@lru_cache(maxsize=4096)
+def _model_control(opcode, f3, f7_5, alu_zero):
+    """Modelo de referência a partir dos campos decodificados (resultado compartilhado: não modificar)."""
     res = ControlExpected()
     alu_op = 0
 
@@ -67,27 +93,15 @@ def model_control(instruction, alu_zero):
     elif opcode == OP_AUIPC:  res.reg_write, res.alu_src_a, res.alu_src_b, alu_op = 1, 1, 1, 0
 
     # Lógica da ALU Control (alu_control.vhd)
-    if alu_op == 0: res.alucontrol = 0
-    elif alu_op == 1:
-        if f3 in [0, 1]: res.alucontrol = 8
-        elif f3 in [4, 5]: res.alucontrol = 2
-        elif f3 in [6, 7]: res.alucontrol = 3
-    elif alu_op == 2:
-        map_r = {0: 8 if f7_5 else 0, 1: 1, 2: 2, 3: 3, 4: 4, 5: 13 if f7_5 else 5, 6: 6, 7: 7}
-        res.alucontrol = map_r.get(f3, 0)
-    elif alu_op == 3:
-        map_i = {0: 0, 1: 1, 2: 2, 3: 3, 4: 4, 5: 13 if f7_5 else 5, 6: 6, 7: 7}
-        res.alucontrol = map_i.get(f3, 0)
+    if alu_op == 1:   res.alucontrol = ALUC_BRANCH[f3]
+    elif alu_op == 2: res.alucontrol = ALUC_R_TYPE[f7_5][f3]
+    elif alu_op == 3: res.alucontrol = ALUC_I_TYPE[f7_5][f3]
 
     # Lógica da Branch Unit (branch_unit.vhd)
     branch_met = False
     if opcode == OP_BRANCH:
-        if f3 == 0:   branch_met = (alu_zero == 1)
-        elif f3 == 1: branch_met = (alu_zero == 0)
-        elif f3 == 4: branch_met = (alu_zero == 0)
-        elif f3 == 5: branch_met = (alu_zero == 1)
-        elif f3 == 6: branch_met = (alu_zero == 0)
-        elif f3 == 7: branch_met = (alu_zero == 1)
+        take_on = BRANCH_TAKEN_ZERO[f3]
+        branch_met = take_on is not None and alu_zero == take_on
 
     # PCSrc Selection (control.vhd)
     if opcode == OP_JALR: res.pcsrc = 2
@@ -107,13 +121,15 @@ async def verify(dut, inst, zero, msg=""):
     await settle()
     
     expected = model_control(inst, zero)
-    current = ControlExpected(
+    current = (
         int(dut.reg_write_o.value), int(dut.alu_src_a_o.value), int(dut.alu_src_b_o.value),
         int(dut.mem_to_reg_o.value), int(dut.mem_write_o.value), int(dut.write_data_src_o.value),
         int(dut.pcsrc_o.value), int(dut.alucontrol_o.value)
     )
     
-    if current != expected:
+    # Comparação direta de tuplas; o objeto para o relatório só é montado em caso de falha
+    if current != expected._key():
+        current = ControlExpected(*current)
         log_error(f"FALHA: {msg} | Inst={hex(inst)} Zero={zero}")
         log_error(f"Esperado: {expected}")
         log_error(f"Recebido: {current}")
@@ -160,9 +176,15 @@ async def test_branch_matrix(dut):
 async def stress_test_control(dut):
     log_header("Stress Test (10000 iterações)")
     opcodes = [OP_R_TYPE, OP_I_TYPE, OP_LOAD, OP_STORE, OP_BRANCH, OP_JAL, OP_JALR, OP_LUI, OP_AUIPC]
-    for i in range(10000):
+
+    # Estímulo (instrução, ALU_Zero) gerado antes do loop com um gerador local (semente do cocotb)
+    rng     = stress_rng()
+    getbits = rng.getrandbits
+    ops     = rng.choices(opcodes, k=10000)
+    vectors = [(op | (getbits(24) << 7), getbits(1)) for op in ops]
+
+    for i, (inst, zero) in enumerate(vectors):
         if i % 2000 == 0:
             log_info(f"Progresso: {i}/10000 iterações concluídas...")
-        inst = random.choice(opcodes) | (random.randint(0, 0xFFFFFF) << 7)
-        await verify(dut, inst, random.choice([0, 1]), "Stress")
+        await verify(dut, inst, zero, "Stress")
     log_success("Stress test concluído com sucesso")
\ No newline at end of file
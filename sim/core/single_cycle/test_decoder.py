@@ -11,10 +11,9 @@
 # ============================================================================================================================================================
 
 import cocotb   # Biblioteca principal do cocotb
-import random   # Para gerar valores aleatórios nos testes
 
 # Importa utilitários compartilhados entre testbenches
-from test_utils import log_header, log_info, log_success, log_error, settle
+from test_utils import log_header, log_info, log_success, log_error, settle, stress_rng
 
 # =====================================================================================================================
 # CONSTANTES (RISC-V OPCODES)
@@ -51,6 +50,10 @@ OP_NAMES = {
 class ControlSignals:
     """Classe auxiliar para agrupar os sinais de controle esperados"""
 
+    # Campos fixos: sem __dict__ por instância (criação e comparação mais baratas)
+    __slots__ = ("reg_write", "alu_src_a", "alu_src_b", "mem_to_reg", "mem_write",
+                 "write_data_src", "branch", "jump", "alu_op")
+
     def __init__(self, rw=0, alu_a=0, alu_b=0, m2r=0, mw=0, wds=0, br=0, jmp=0, alu_op=0):
         self.reg_write = rw
         self.alu_src_a = alu_a
@@ -62,8 +65,12 @@ class ControlSignals:
         self.jump = jmp
         self.alu_op = alu_op
 
+    def _key(self):
+        return (self.reg_write, self.alu_src_a, self.alu_src_b, self.mem_to_reg, self.mem_write,
+                self.write_data_src, self.branch, self.jump, self.alu_op)
+
     def __eq__(self, other):
-        return self.__dict__ == other.__dict__
+        return self._key() == other._key()
 
     def __str__(self):
         return (f"RW={self.reg_write} SrcA={self.alu_src_a} SrcB={self.alu_src_b} "
@@ -131,21 +138,22 @@ async def verify_decoder(dut, opcode, expected, case_desc):
     # Aguarda propagação combinacional
     await settle()
     
-    # Leitura dos sinais atuais
-    current = ControlSignals(
-        rw      = int(dut.reg_write_o.value),
-        alu_a   = int(dut.alu_src_a_o.value),
-        alu_b   = int(dut.alu_src_b_o.value),
-        m2r     = int(dut.mem_to_reg_o.value),
-        mw      = int(dut.mem_write_o.value),
-        wds     = int(dut.write_data_src_o.value),
-        br      = int(dut.branch_o.value),
-        jmp     = int(dut.jump_o.value),
-        alu_op  = int(dut.alu_op_o.value)
+    # Leitura dos sinais atuais (na mesma ordem de ControlSignals._key)
+    current = (
+        int(dut.reg_write_o.value),
+        int(dut.alu_src_a_o.value),
+        int(dut.alu_src_b_o.value),
+        int(dut.mem_to_reg_o.value),
+        int(dut.mem_write_o.value),
+        int(dut.write_data_src_o.value),
+        int(dut.branch_o.value),
+        int(dut.jump_o.value),
+        int(dut.alu_op_o.value)
     )
     
-    # Comparação
-    if current != expected:
+    # Comparação direta de tuplas; o objeto para o relatório só é montado em caso de falha
+    if current != expected._key():
+        current = ControlSignals(*current)
         op_name = OP_NAMES.get(opcode, f"UNK({hex(opcode)})")
         log_error(f"FALHA: {case_desc}")
         log_error(f"Opcode: {op_name}")
@@ -206,15 +214,14 @@ async def stress_test_randomized(dut):
     # Lista de opcodes válidos conhecidos
     valid_opcodes = list(OP_NAMES.keys())
     
+    # Gera todas as entradas aleatórias antes do loop (gerador compartilhado dos stress tests)
+    # 80% de chance de gerar um opcode válido, 20% de lixo aleatório (7 bits)
+    rng = stress_rng()
+    opcodes = [rng.choice(valid_opcodes) if rng.random() < 0.8 else rng.getrandbits(7)
+               for _ in range(NUM_ITERATIONS)]
+
     # Loop de iterações aleatórias 
-    for i in range(NUM_ITERATIONS):
-        
-        # Gera entradas aleatórias
-        # 80% de chance de gerar um opcode válido, 20% de lixo aleatório
-        if random.random() < 0.8:
-            opcode = random.choice(valid_opcodes)
-        else:
-            opcode = random.randint(0, 127) # 7 bits
+    for i, opcode in enumerate(opcodes):
         
         # Calcula esperado pelo modelo
         expected = model_decoder(opcode)
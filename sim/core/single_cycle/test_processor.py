@@ -3,231 +3,30 @@
 # ================================================================================================================
 #
 # >>> Descrição: Testbench para o Processador RISC-V (RV32I).
-#     Este módulo simula o ambiente externo ao processador, atuando como:
-#      1. Memória Principal (RAM de Instruções e Dados unificada).
-#      2. Controlador de Periféricos (MMIO) para Console e Controle de Simulação.
+#     O ambiente externo ao processador (RAM unificada + MMIO de Console e Controle de Simulação)
+#     é o modelo compartilhado em sim/common/mem_model.py; aqui fica apenas a sequência de
+#     reset específica do core single-cycle.
 #
 # ================================================================================================================
 
 # Importações COCOTB
 import cocotb
-from cocotb.clock import Clock
-from cocotb.triggers import RisingEdge, Event, with_timeout
+from cocotb.triggers import ClockCycles, Event, with_timeout
 
 # Importação módulo os do sistema operacional para manipulação de arquivos
 import os
 
-# Importa utilitários compartilhados (logs customizados, funções de delay, etc.)
-from test_utils import (
-    log_header, log_info, log_success, log_console, log_error, 
-    log_int, settle
-)
+# Importa utilitários compartilhados (logs customizados)
+from test_utils import log_header, log_info, log_success, log_error, drive_zero
 
-# ================================================================================================================
-# MAPA DE MEMÓRIA (Memory Map)
-# ================================================================================================================
-
-# Define os endereços reservados para interação com o ambiente de simulação.
-# O processador escreve nestes endereços usando instruções SW (Store Word).
-
-MMIO_CONSOLE_ADDR = 0x10000000  # Escrita de char: Imprime caractere no terminal
-MMIO_INT_ADDR     = 0x10000004  # Escrita de int:  Imprime valor numérico (debug)
-MMIO_HALT_ADDR    = 0x10000008  # Escrita de flag: Encerra a simulação com sucesso (HALT)
-
-# ================================================================================================================
-# 1. CARREGADOR DE PROGRAMA (HEX LOADER)
-# ================================================================================================================
-
-def load_hex_program(filepath):
-    """
-    Lê o arquivo .hex gerado e carrega em um dicionário.
-    
-    Args:
-        filepath (str): Caminho para o arquivo .hex
-        
-    Returns:
-        dict: Mapa {endereço_inteiro: valor_palavra_32bits} representando a RAM.
-    """
-
-    mem_dict = {}
-    current_addr = 0
-    buffer_bytes = []
-    
-    log_info(f"Loader: carregando software {filepath}...")
-    
-    try:
-        with open(filepath, 'r') as f:
-            for line in f:
-                line = line.strip()
-                if not line: continue
-                
-                # O formato gerado pelo objcopy -O verilog usa @ADDR para pular endereços
-                if line.startswith('@'):
-                    # Se havia bytes pendentes do bloco anterior, salva-os antes de mudar o endereço
-                    if buffer_bytes:
-                        flush_buffer_to_mem(mem_dict, current_addr, buffer_bytes)
-                        buffer_bytes = []
-                    # Define novo endereço base (remove o @ e converte de hex)
-                    current_addr = int(line[1:], 16)
-                else:
-                    # Lê bytes de dados (ex: "13 00 00 00")
-                    parts = line.split()
-                    for byte_str in parts:
-                        buffer_bytes.append(int(byte_str, 16))
-                        # A cada 4 bytes, formamos uma palavra de 32 bits (RISC-V Word)
-                        if len(buffer_bytes) == 4:
-                            flush_buffer_to_mem(mem_dict, current_addr, buffer_bytes)
-                            current_addr += 4
-                            buffer_bytes = []
-                            
-        # Flush final caso o arquivo termine com bytes pendentes
-        if buffer_bytes:
-            flush_buffer_to_mem(mem_dict, current_addr, buffer_bytes)
-            
-    except Exception as e:
-        log_error(f"Falha crítica no Loader: {e}")
-        return {}
-        
-    return mem_dict
-
-def flush_buffer_to_mem(mem, addr, bytes_list):
-    """
-    Converte uma lista de até 4 bytes para uma palavra de 32 bits (Little Endian).
-    RISC-V é Little Endian: o byte menos significativo fica no menor endereço.
-    """
-    # Preenche com zeros se a última palavra estiver incompleta
-    while len(bytes_list) < 4: 
-        bytes_list.append(0)
-    
-    # Montagem da palavra: Byte3 << 24 | Byte2 << 16 | Byte1 << 8 | Byte0
-    val = (bytes_list[3] << 24) | (bytes_list[2] << 16) | (bytes_list[1] << 8) | bytes_list[0]
-    
-    # Armazena no dicionário de memória (alinhado por endereço de byte)
-    mem[addr] = val
-
-# ================================================================================================================
-# 2. CONTROLADOR DE MEMÓRIA E PERIFÉRICOS (Modelo Síncrono)
-# ================================================================================================================
-
-async def memory_and_mmio_controller(dut, mem_data, halt_event):
-    """
-    Simula o comportamento da memória RAM e dos dispositivos de I/O.
-    """
-    log_info("Controlador de Memória Ativo e Monitorando Barramentos.")
-    console_buffer = ""
-
-    while True:
-
-        # ----------------------------------------------------------------------
-        # [FASE 0] INÍCIO DO CICLO (Sincronização)
-        # ----------------------------------------------------------------------
-        await RisingEdge(dut.CLK_i)
-        await settle() 
-
-        # ----------------------------------------------------------------------
-        # [FASE 1] INSTRUCTION FETCH (Busca de Instrução)
-        # ----------------------------------------------------------------------
-        try: 
-            i_addr = int(dut.IMem_addr_o.value)
-        except ValueError: 
-            i_addr = 0
-        
-        instruction_val = mem_data.get(i_addr & 0xFFFFFFFC, 0)
-        dut.IMem_data_i.value = instruction_val
-
-        # ----------------------------------------------------------------------
-        # [FASE 2] DECODE & EXECUTE DELAY (Propagação Interna)
-        # ----------------------------------------------------------------------
-        await settle() 
-
-        # ----------------------------------------------------------------------
-        # [FASE 3] MEMORY READ (Leitura de Dados - Loads)
-        # ----------------------------------------------------------------------
-        try: 
-            d_addr = int(dut.DMem_addr_o.value)
-        except ValueError: 
-            d_addr = 0
-        
-        # Entrega o dado da memória (Loads leem a palavra inteira, a LSU formata)
-        dut.DMem_data_i.value = mem_data.get(d_addr & 0xFFFFFFFC, 0)
-
-        # ----------------------------------------------------------------------
-        # [FASE 4] WRITE SETUP DELAY (Preparação para Escrita)
-        # ----------------------------------------------------------------------
-        await settle() 
-
-        # ----------------------------------------------------------------------
-        # [FASE 5] MEMORY WRITE (Efetivação da Escrita - Stores)
-        # ----------------------------------------------------------------------
-
-        # Verifica sinais de escrita
-        try:
-            # ATUALIZADO: Nome do sinal para DMem_writeEnable_o
-            d_we = int(dut.DMem_writeEnable_o.value) 
-            d_data = int(dut.DMem_data_o.value)
-            d_addr_write = int(dut.DMem_addr_o.value)
-        except ValueError: 
-            d_we = 0
-
-        # ATUALIZADO: Verifica se ALGUM bit da máscara de escrita está ativo (> 0)
-        if d_we > 0:
-            
-            # --- Periférico: CONSOLE (Simula UART) ---
-            if d_addr_write == MMIO_CONSOLE_ADDR:
-                # Assume que a escrita no console usa o byte menos significativo (d_we=1 ou d_we=15)
-                char = chr(d_data & 0xFF)
-                if char == '\n':
-                    log_console(f"{console_buffer}")
-                    console_buffer = ""
-                else:
-                    console_buffer += char
-            
-            # --- Periférico: DEBUG INT (Imprime Inteiros) ---
-            elif d_addr_write == MMIO_INT_ADDR:
-                val_signed = d_data if d_data < 0x80000000 else d_data - 0x100000000
-                log_int(f"{val_signed}")
-            
-            # --- Controle: HALT (Fim de Simulação) ---
-            elif d_addr_write == MMIO_HALT_ADDR:
-                log_success("Sinal de HALT recebido via MMIO! Encerrando simulação.")
-                halt_event.set()
-                break 
-            
-            # --- Memória: RAM NORMAL (Store com Byte Enable) ---
-            else:
-                # Endereço alinhado da palavra
-                aligned_addr = d_addr_write & 0xFFFFFFFC
-                
-                # Leitura: Pega o valor atual da palavra na memória (ou 0 se não existir)
-                current_word = mem_data.get(aligned_addr, 0)
-                
-                # Modificação: Aplica a máscara de escrita (d_we)
-                # A LSU já deslocou o d_data para a posição correta (byte lane alignment).
-                # Nós só precisamos misturar os bytes novos com os antigos.
-                
-                new_word = current_word
-                
-                # Byte 0 (LSB) - bits 7:0
-                if (d_we & 0x1):
-                    new_word = (new_word & 0xFFFFFF00) | (d_data & 0x000000FF)
-                
-                # Byte 1 - bits 15:8
-                if (d_we & 0x2):
-                    new_word = (new_word & 0xFFFF00FF) | (d_data & 0x0000FF00)
-                
-                # Byte 2 - bits 23:16
-                if (d_we & 0x4):
-                    new_word = (new_word & 0xFF00FFFF) | (d_data & 0x00FF0000)
-                
-                # Byte 3 (MSB) - bits 31:24
-                if (d_we & 0x8):
-                    new_word = (new_word & 0x00FFFFFF) | (d_data & 0xFF000000)
+# Modelo de memória e periféricos compartilhado entre os cores
+from mem_model import load_hex, make_controller, HandshakeMode, start_clock
 
-                # Escrita: Salva a nova palavra combinada
-                mem_data[aligned_addr] = new_word
+# Entradas zeradas durante o reset (barramentos de memória)
+RESET_ZERO_INPUTS = ("IMem_data_i", "DMem_data_i")
 
 # ================================================================================================================
-# 3. TESTE PRINCIPAL (Main Test)
+# TESTE PRINCIPAL (Main Test)
 # ================================================================================================================
 
 @cocotb.test()
@@ -252,20 +51,23 @@ async def test_processor_execution(dut):
         return
     
     # Carrega a "imagem" da RAM a partir do arquivo
-    ram_image = load_hex_program(hex_path)
+    ram_image = load_hex(hex_path)
     
     # ----------------------------------------------------------------------
     # [FASE 2] Inicialização da Simulação
     # ----------------------------------------------------------------------
     
-    # Inicia o Clock (100MHz = 10ns período)
-    cocotb.start_soon(Clock(dut.CLK_i, 10, unit="ns").start())
+    # Inicia o Clock (100MHz = 10ns período); com USE_PY_CLOCK=0 o clock vem do HDL
+    start_clock(dut)
     
     # Cria evento de sincronização para saber quando o processador terminou
     halt_event = Event()
     
     # Inicia o controlador de memória em paralelo (thread secundária)
-    cocotb.start_soon(memory_and_mmio_controller(dut, ram_image, halt_event))
+    cocotb.start_soon(make_controller(
+        dut, ram_image, halt_event,
+        mode=HandshakeMode.SYNC, we_signal="DMem_writeEnable_o"
+    ))
 
     # ----------------------------------------------------------------------
     # [FASE 3] Sequência de Reset
@@ -276,12 +78,10 @@ async def test_processor_execution(dut):
     dut.Reset_i.value = 1
     
     # Inicializa barramentos de entrada para evitar estados indeterminados ('X')
-    dut.IMem_data_i.value = 0
-    dut.DMem_data_i.value = 0
+    drive_zero(dut, RESET_ZERO_INPUTS)
     
     # Segura o Reset por 2 ciclos de clock
-    await RisingEdge(dut.CLK_i)
-    await RisingEdge(dut.CLK_i)
+    await ClockCycles(dut.CLK_i, 2)
     dut.Reset_i.value = 0
     
     # Indica que o processador pode começar a operar
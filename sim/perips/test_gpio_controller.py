@@ -58,6 +58,36 @@ async def bus_write(dut, address, data):
     # Pequeno delay para propagação combinacional
     await settle()
 
+async def bus_write_burst(dut, address, values):
+    """
+    Realiza uma rajada de escritas no mesmo endereço: sel_i/we_i ficam ativos
+    durante toda a rajada e cada valor ocupa um único ciclo de clock.
+    Retorna o valor do pino gpio_leds observado após cada escrita.
+    """
+    leds     = dut.gpio_leds
+    data_i   = dut.data_i
+    clk_edge = RisingEdge(dut.clk)
+    observed = []
+
+    dut.sel_i.value  = 1
+    dut.we_i.value   = 1
+    dut.addr_i.value = address
+
+    for k, val in enumerate(values):
+        data_i.value = val
+        await clk_edge
+        # Na borda k o pino ainda mostra a escrita k-1 (registrada na borda anterior)
+        if k:
+            observed.append(int(leds.value))
+
+    # Desabilita o barramento e aguarda a última escrita aparecer no pino
+    dut.sel_i.value = 0
+    dut.we_i.value  = 0
+    await settle()
+    observed.append(int(leds.value))
+
+    return observed
+
 async def bus_read(dut, address):
     """Realiza uma leitura no barramento simulado."""
     dut.sel_i.value = 1
@@ -152,24 +182,38 @@ async def stress_test_randomized(dut):
     
     NUM_ITERATIONS = 2000 # Aumentado um pouco para cobrir mais casos
     current_led_state = 0
+
+    # Sequência de operações gerada antes: 0: Escrever LED, 1: Ler LED, 2: Ler Switch
+    op_types = [random.randint(0, 2) for _ in range(NUM_ITERATIONS)]
+
+    # Handle do pino de switches resolvido uma única vez, fora do loop
+    gpio_sw = dut.gpio_sw
     
-    for i in range(NUM_ITERATIONS):
+    i = 0
+    while i < NUM_ITERATIONS:
         
-        # Escolhe aleatoriamente uma operação: 
-        # 0: Escrever LED, 1: Ler LED, 2: Ler Switch
-        op_type = random.randint(0, 2)
+        op_type = op_types[i]
         
-        if op_type == 0: # --- WRITE LED ---
-            # Gera valor aleatório de 16 bits (0 a 65535)
-            val_to_write = random.randint(0, 0xFFFF) 
+        if op_type == 0: # --- WRITE LED (rajada de escritas consecutivas) ---
+            # Agrupa as escritas consecutivas em uma única rajada no barramento
+            end = i
+            while end < NUM_ITERATIONS and op_types[end] == 0:
+                end += 1
+
+            # Gera valores aleatórios de 16 bits (0 a 65535)
+            values = [random.randint(0, 0xFFFF) for _ in range(end - i)]
             
-            await bus_write(dut, ADDR_LEDS, val_to_write)
-            current_led_state = val_to_write
+            observed = await bus_write_burst(dut, ADDR_LEDS, values)
+            current_led_state = values[-1]
             
-            # Verifica saída física imediatamente
-            if dut.gpio_leds.value != val_to_write:
-                log_error(f"Iter {i}: Falha Escrita LED. Exp: 0x{val_to_write:X}, Obtido: 0x{dut.gpio_leds.value}")
-                assert False
+            # Verifica a saída física de cada escrita da rajada
+            for k, (val_to_write, got) in enumerate(zip(values, observed)):
+                if got != val_to_write:
+                    log_error(f"Iter {i + k}: Falha Escrita LED. Exp: 0x{val_to_write:X}, Obtido: 0x{got:X}")
+                    assert False
+
+            i = end
+            continue
 
         elif op_type == 1: # --- READ LED ---
             read_val = await bus_read(dut, ADDR_LEDS)
@@ -182,7 +226,7 @@ async def stress_test_randomized(dut):
         elif op_type == 2: # --- READ SWITCH ---
             # Gera um estímulo aleatório no pino (16 bits)
             sw_val = random.randint(0, 0xFFFF)
-            dut.gpio_sw.value = sw_val
+            gpio_sw.value = sw_val
             await settle()
             
             # Lê via barramento
@@ -192,4 +236,6 @@ async def stress_test_randomized(dut):
                 log_error(f"Iter {i}: Falha Leitura Switch. Exp: 0x{sw_val:X}, Lido: 0x{read_val & MASK_16_BIT:X}")
                 assert False
 
+        i += 1
+
     log_success(f"{NUM_ITERATIONS} Iterações Aleatórias (RW) concluídas com sucesso")
\ No newline at end of file
@@ -9,7 +9,7 @@
 
 import cocotb
 from cocotb.clock import Clock
-from cocotb.triggers import RisingEdge, Timer
+from cocotb.triggers import RisingEdge, FallingEdge, Timer
 from test_utils import log_header, log_info, log_success, log_error, log_console
 
 # =====================================================================================================
@@ -20,6 +20,11 @@ CLK_PERIOD_NS = 10
 CYCLES_PER_BIT = 868 # 100 MHz / 115200 baud = 868.055... ciclos 
 BIT_PERIOD_NS  = CYCLES_PER_BIT * CLK_PERIOD_NS
 
+# Triggers de tempo de bit construídos uma única vez e reaproveitados a cada bit
+# (sniff_tx_pin e drive_rx_pin nunca ficam pendentes ao mesmo tempo sobre eles)
+_BIT_TIMER          = Timer(BIT_PERIOD_NS, unit="ns")
+_START_TO_MID_TIMER = Timer(int(BIT_PERIOD_NS * 1.5), unit="ns")
+
 ADDR_DATA = 0x0
 ADDR_STAT = 0x4
 
@@ -68,27 +73,29 @@ async def cpu_read(dut, addr):
 
 async def sniff_tx_pin(dut):
     """Monitora o pino TX físico"""
-    while dut.uart_tx_pin.value == 1: await RisingEdge(dut.clk)
+    # Espera o start bit por evento (borda de descida do pino), sem acordar a cada ciclo de clock
+    if dut.uart_tx_pin.value == 1:
+        await FallingEdge(dut.uart_tx_pin)
     
     # Pula para o meio do primeiro bit de dados (Start + 0.5 Data)
     # Start (1 bit) + 0.5 bit = 1.5 bits
-    await Timer(int(BIT_PERIOD_NS * 1.5), unit="ns")
+    await _START_TO_MID_TIMER
     
     byte_val = 0
     for i in range(8):
         byte_val |= (int(dut.uart_tx_pin.value) << i)
-        await Timer(BIT_PERIOD_NS, unit="ns")
+        await _BIT_TIMER
     return byte_val
 
 async def drive_rx_pin(dut, byte_val):
     """Injeta dados no pino RX físico"""
     dut.uart_rx_pin.value = 0 # Start
-    await Timer(BIT_PERIOD_NS, unit="ns")
+    await _BIT_TIMER
     for i in range(8):
         dut.uart_rx_pin.value = (byte_val >> i) & 1
-        await Timer(BIT_PERIOD_NS, unit="ns")
+        await _BIT_TIMER
     dut.uart_rx_pin.value = 1 # Stop
-    await Timer(BIT_PERIOD_NS, unit="ns")
+    await _BIT_TIMER
 
 # =====================================================================================================
 # TESTE 1: TRANSMISSÃO (TX PATH)